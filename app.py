@@ -1,18 +1,32 @@
+# Timed from the very first line so the import phase is included
+from startup import RunTimer
+run_timer = RunTimer()
+
+import logging
 import os
 import streamlit as st
 from dotenv import load_dotenv
-from llama_index.core import SimpleDirectoryReader, Settings
-from llama_index.core.llms import ChatMessage
-from llama_index.llms.openai import OpenAI
-from llama_index.embeddings.openai import OpenAIEmbedding
 from datetime import datetime
-import io
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_LEFT, TA_CENTER
-import re
+import time
+import config
+from metrics import REGISTRY, configure_logging
+from assistant import QUICK_ACTIONS, Assistant, pack_prompts
+from corpus import CorpusCache
+from embedding_store import EmbeddingStore
+from jobs import DONE, FAILED, JobQueue
+from memory import ConversationMemory
+from response_cache import ResponseCache
+from pdf_cache import FlowableCache, PdfCache
+from resilience import CircuitBreaker, RequestPolicy
+from tokens import UsageLog
+from uploads import save_uploads, upload_signature
+from assets import AssetCache
+from workspaces import WorkspaceSweeper, new_workspace_id, open_workspace, valid_workspace_id
+# LlamaIndex, ReportLab and httpx are imported where first used, not here
+run_timer.mark("imports")
+
+# Structured timing logs on stderr; the admin page shows the same numbers
+configure_logging(config.LOG_LEVEL)
 
 # Load .env file for OpenAI key
 load_dotenv()
@@ -25,14 +39,39 @@ if not openai_api_key:
     st.info("Go to your Streamlit app settings and add OPENAI_API_KEY to secrets.")
     st.stop()
 
-# Configure OpenAI LLM
-llm = OpenAI(
-    api_key=openai_api_key,
-    model="gpt-3.5-turbo",
-    temperature=0.1,
-    max_tokens=1000
-)
-Settings.llm = llm
+@st.cache_resource
+def get_http_pool():
+    # One keep-alive connection pool and in-flight bound for every client in the process
+    from client_pool import make_http_client
+    return make_http_client(config.HTTP_MAX_IN_FLIGHT, config.HTTP_TIMEOUT)
+
+# The clients are built on the first request that needs them, not on the first page load
+@st.cache_resource
+def get_llm(api_key, model, temperature, max_tokens, api_base=None):
+    # Built once per configuration rather than on every rerun of every session
+    from llama_index.core import Settings
+    from llama_index.llms.openai import OpenAI
+    http_client, _ = get_http_pool()
+    Settings.llm = OpenAI(
+        api_key=api_key,
+        model=model,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        # Retries and backoff are left to the request policy, so they are not compounded here
+        max_retries=0,
+        api_base=api_base,
+        http_client=http_client
+    )
+    return Settings.llm
+
+@st.cache_resource
+def get_embed_model(api_key, model, api_base=None):
+    from llama_index.core import Settings
+    from llama_index.embeddings.openai import OpenAIEmbedding
+    http_client, _ = get_http_pool()
+    Settings.embed_model = OpenAIEmbedding(api_key=api_key, model=model, api_base=api_base,
+                                           http_client=http_client)
+    return Settings.embed_model
 
 # Streamlit page config
 st.set_page_config(
@@ -42,471 +81,123 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Custom CSS based on your design mockups and color palette
-st.markdown("""
-<style>
-/* Import Google Fonts */
-@import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
-
-/* Color Palette from your design */
-:root {
-    --color-primary: #274C77;      /* Dark blue */
-    --color-secondary: #6096BA;    /* Medium blue */
-    --color-accent: #A3CEF1;       /* Light blue */
-    --color-orange: #FB5012;       /* Orange accent */
-    --color-light: #E7ECEF;        /* Light gray */
-    --color-white: #FFFFFF;
-    --color-text: #1a1a1a;
-    --color-text-light: #666666;
-}
-
-/* Hide Streamlit default elements */
-.stApp > header {display: none;}
-.stApp > .main > div {padding-top: 0rem;}
-#MainMenu {visibility: hidden;}
-footer {visibility: hidden;}
-
-/* Global styling */
-* {
-    font-family: 'Inter', sans-serif;
-}
-
-/* Main container */
-.main-container {
-    background: transparent;
-}
-
-/* Header styling */
-.app-header {
-    background: var(--color-white);
-    padding: 2rem 3rem;
-    text-align: center;
-    border-bottom: 1px solid #e5e7eb;
-    margin-bottom: 0;
-}
-
-.app-title {
-    font-size: 3rem;
-    font-weight: 700;
-    color: #1a1a1a !important;
-    margin: 0;
-    letter-spacing: -1px;
-}
-
-.app-subtitle {
-    font-size: 1.1rem;
-    color: var(--color-text-light);
-    margin-top: 0.5rem;
-    font-weight: 400;
-}
-
-/* Setup screen styling */
-.setup-container {
-    max-width: 1200px;
-    margin: 3rem auto;
-    padding: 0 2rem;
-}
-
-.setup-grid {
-    display: grid;
-    grid-template-columns: 1fr 1fr;
-    gap: 2rem;
-    margin-bottom: 2rem;
-}
-
-.setup-card {
-    background: var(--color-white);
-    border-radius: 12px;
-    padding: 2.5rem;
-    border: 2px solid #e5e7eb;
-    transition: all 0.3s ease;
-    text-align: center;
-    min-height: 200px;
-    display: flex;
-    flex-direction: column;
-    justify-content: center;
-}
-
-.setup-card:hover {
-    border-color: var(--color-secondary);
-    box-shadow: 0 10px 30px rgba(39, 76, 119, 0.1);
-    transform: translateY(-2px);
-}
-
-.setup-card-large {
-    grid-column: 1 / -1;
-    min-height: 150px;
-}
-
-.setup-card h3 {
-    color: var(--color-primary);
-    font-size: 1.3rem;
-    font-weight: 600;
-    margin-bottom: 1rem;
-}
-
-.setup-card p {
-    color: var(--color-text-light);
-    margin-bottom: 1.5rem;
-    line-height: 1.5;
-}
-
-/* Chat interface styling */
-.chat-interface {
-    display: flex;
-    height: 100vh;
-    max-height: 100vh;
-    overflow: hidden;
-    position: fixed;
-    top: 0;
-    left: 0;
-    right: 0;
-    bottom: 0;
-}
-
-.chat-panel {
-    flex: 1.2;
-    background: var(--color-white);
-    border-right: 1px solid #e5e7eb;
-    display: flex;
-    flex-direction: column;
-    height: 100vh;
-    overflow: hidden;
-}
-
-.content-panel {
-    flex: 0.8;
-    background: var(--color-light);
-    display: flex;
-    flex-direction: column;
-    height: 100vh;
-    overflow: hidden;
-    position: relative;
-}
-
-/* Chat header */
-.chat-header {
-    padding: 1.5rem 2rem;
-    border-bottom: 1px solid #e5e7eb;
-    background: var(--color-white);
-    flex-shrink: 0;
-}
-
-.chat-title {
-    font-size: 1.5rem;
-    font-weight: 600;
-    color: #1a1a1a;
-    margin: 0;
-}
-
-.chat-subtitle {
-    font-size: 0.9rem;
-    color: var(--color-text-light);
-    margin-top: 0.3rem;
-}
-
-/* Quick actions */
-.quick-actions {
-    padding: 1rem 2rem;
-    border-bottom: 1px solid #e5e7eb;
-    background: #fafbfc;
-}
-
-.quick-actions h4 {
-    font-size: 0.9rem;
-    font-weight: 600;
-    color: var(--color-text);
-    margin: 0 0 0.8rem 0;
-    text-transform: uppercase;
-    letter-spacing: 0.5px;
-}
-
-.action-buttons {
-    display: grid;
-    grid-template-columns: 1fr 1fr;
-    gap: 0.5rem;
-}
-
-/* Chat messages */
-.chat-messages {
-    flex: 1;
-    overflow-y: auto;
-    padding: 1rem 2rem;
-    background: var(--color-white);
-}
-
-.message {
-    margin-bottom: 1.5rem;
-    animation: fadeInUp 0.3s ease;
-}
-
-.message-user {
-    display: flex;
-    justify-content: flex-end;
-}
-
-.message-ai {
-    display: flex;
-    justify-content: flex-start;
-}
-
-.message-bubble {
-    max-width: 80%;
-    padding: 1rem 1.2rem;
-    border-radius: 12px;
-    font-size: 0.95rem;
-    line-height: 1.5;
-}
-
-.message-bubble-user {
-    background: var(--color-primary);
-    color: var(--color-white);
-    border-bottom-right-radius: 4px;
-}
-
-.message-bubble-ai {
-    background: #f8fafc;
-    color: var(--color-text);
-    border: 1px solid #e5e7eb;
-    border-bottom-left-radius: 4px;
-}
-
-.message-header {
-    font-weight: 600;
-    font-size: 0.8rem;
-    margin-bottom: 0.5rem;
-    opacity: 0.8;
-}
-
-/* Chat input */
-.chat-input {
-    padding: 1.5rem 2rem;
-    border-top: 1px solid #e5e7eb;
-    background: var(--color-white);
-    flex-shrink: 0;
-}
-
-/* Content panel styling */
-.content-header {
-    padding: 1.5rem 2rem;
-    border-bottom: 1px solid #e5e7eb;
-    background: var(--color-white);
-    display: flex;
-    justify-content: space-between;
-    align-items: center;
-}
-
-.content-title {
-    font-size: 1.2rem;
-    font-weight: 600;
-    color: var(--color-primary);
-    margin: 0;
-}
-
-.content-area {
-    flex: 1;
-    overflow-y: auto;
-    padding: 2rem;
-    background: var(--color-light);
-}
-
-.content-display {
-    background: var(--color-white);
-    border-radius: 12px;
-    padding: 2rem;
-    border: 1px solid #e5e7eb;
-    font-size: 0.95rem;
-    line-height: 1.7;
-    color: var(--color-text);
-    min-height: 400px;
-}
-
-.content-placeholder {
-    text-align: center;
-    color: var(--color-text-light);
-    font-size: 1rem;
-    padding: 3rem 2rem;
-}
-
-/* Button styling */
-.stButton > button {
-    background: var(--color-secondary) !important;
-    color: var(--color-white) !important;
-    border: none !important;
-    border-radius: 8px !important;
-    padding: 0.7rem 1.5rem !important;
-    font-weight: 500 !important;
-    font-size: 0.9rem !important;
-    transition: all 0.2s ease !important;
-    box-shadow: 0 2px 4px rgba(0,0,0,0.1) !important;
-}
-
-.stButton > button:hover {
-    background: var(--color-primary) !important;
-    transform: translateY(-1px) !important;
-    box-shadow: 0 4px 8px rgba(0,0,0,0.15) !important;
-}
-
-.stButton > button:active {
-    transform: translateY(0px) !important;
-}
-
-/* Orange accent buttons */
-.stButton > button[kind="primary"] {
-    background: var(--color-orange) !important;
-}
-
-.stButton > button[kind="primary"]:hover {
-    background: #e8460f !important;
-}
-
-/* Form styling */
-.stTextInput > div > div > input {
-    border-radius: 8px !important;
-    border: 1px solid #e5e7eb !important;
-    padding: 0.8rem 1rem !important;
-    font-size: 0.95rem !important;
-}
-
-.stTextInput > div > div > input:focus {
-    border-color: var(--color-secondary) !important;
-    box-shadow: 0 0 0 2px rgba(96, 150, 186, 0.2) !important;
-}
-
-.stTextArea > div > div > textarea {
-    border-radius: 8px !important;
-    border: 1px solid #e5e7eb !important;
-    padding: 0.8rem 1rem !important;
-    font-size: 0.95rem !important;
-}
-
-/* Welcome message styling */
-.welcome-message {
-    text-align: center;
-    padding: 3rem 2rem;
-    color: var(--color-text-light);
-}
-
-.welcome-message h3 {
-    color: var(--color-primary);
-    margin-bottom: 1rem;
-}
-
-/* Animations */
-@keyframes fadeInUp {
-    from {
-        opacity: 0;
-        transform: translateY(20px);
-    }
-    to {
-        opacity: 1;
-        transform: translateY(0);
-    }
-}
-
-/* Responsive design */
-@media (max-width: 1024px) {
-    .chat-interface {
-        flex-direction: column;
-        position: relative;
-        height: auto;
-    }
-    
-    .chat-panel {
-        flex: none;
-        height: auto;
-        max-height: none;
-    }
-    
-    .content-panel {
-        flex: none;
-        height: auto;
-        max-height: none;
-        border-top: 1px solid #e5e7eb;
-        border-right: none;
-    }
-    
-    .setup-grid {
-        grid-template-columns: 1fr;
-    }
-}
-
-/* Hide streamlit elements */
-.stDeployButton {display: none;}
-.stDecoration {display: none;}
-</style>
-""", unsafe_allow_html=True)
+# Custom CSS based on your design mockups and color palette, kept in static/style.css
+STYLESHEET = os.path.join("static", "style.css")
+
+# Runs in a zero-height component frame: fetches the stylesheet through Streamlit's
+# static file route (cached by the browser) and installs it in the page head, where
+# it outlives the frame. Served .css files are typed text/plain, so a <link> would be refused.
+STYLESHEET_LOADER = """
+<script>
+const page = window.parent.document;
+fetch(new URL("app/static/style.css?v={version}", window.parent.location.href))
+    .then((response) => response.text())
+    .then((css) => {{
+        let style = page.getElementById("teach-assist-style");
+        if (!style) {{
+            style = page.createElement("style");
+            style.id = "teach-assist-style";
+            page.head.appendChild(style);
+        }}
+        style.textContent = css;
+    }});
+</script>
+"""
+
+@st.cache_resource
+def get_asset_cache():
+    return AssetCache(reload=config.ASSET_RELOAD)
+
+def apply_stylesheet():
+    """Send the stylesheet at most once per session (and again only if the file changes)"""
+    assets = get_asset_cache()
+    if config.INLINE_CSS:
+        st.markdown(f"<style>{assets.read(STYLESHEET)}</style>", unsafe_allow_html=True)
+        return
+    version = assets.version(STYLESHEET)
+    if st.session_state.get("stylesheet_version") != version:
+        import streamlit.components.v1 as components
+        components.html(STYLESHEET_LOADER.format(version=version), height=0)
+        st.session_state.stylesheet_version = version
+
+apply_stylesheet()
 
 # Helper functions
 def load_template(filename):
-    template_path = os.path.join("templates", filename)
-    if os.path.exists(template_path):
-        with open(template_path, "r", encoding="utf-8") as f:
-            return f.read()
-    else:
+    template = get_asset_cache().read(os.path.join("templates", filename))
+    if template is None:
         return f"Template file '{filename}' not found. Please ensure templates folder exists."
+    return template
 
-def create_pdf_from_content(content, title="Teach Assist Content"):
-    """Create a PDF from the given content"""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
-    
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        spaceAfter=30,
-        alignment=TA_CENTER
-    )
-    
-    content_style = ParagraphStyle(
-        'ContentStyle',
-        parent=styles['Normal'],
-        fontSize=11,
-        spaceAfter=12,
-        leftIndent=0,
-        rightIndent=0,
-    )
-    
-    story = []
-    title_para = Paragraph(title, title_style)
-    story.append(title_para)
-    
-    date_str = datetime.now().strftime("%B %d, %Y at %I:%M %p")
-    date_para = Paragraph(f"<i>Generated on {date_str}</i>", styles['Normal'])
-    story.append(date_para)
-    story.append(Spacer(1, 20))
-    
-    content_lines = content.split('\n')
-    for line in content_lines:
-        if line.strip():
-            formatted_line = line
-            formatted_line = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', formatted_line)
-            formatted_line = re.sub(r'\*(.*?)\*', r'<i>\1</i>', formatted_line)
-            formatted_line = re.sub(r'`(.*?)`', r'<font name="Courier">\1</font>', formatted_line)
-            
-            if line.startswith('###'):
-                formatted_line = f"<b>{line.replace('###', '').strip()}</b>"
-            elif line.startswith('##'):
-                formatted_line = f"<b><font size=14>{line.replace('##', '').strip()}</font></b>"
-            elif line.startswith('#'):
-                formatted_line = f"<b><font size=16>{line.replace('#', '').strip()}</font></b>"
-            
-            para = Paragraph(formatted_line, content_style)
-            story.append(para)
-        else:
-            story.append(Spacer(1, 6))
-    
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
+def render_bubble_html(sender, msg):
+    if sender == "user":
+        return f"""
+                <div class="message message-user">
+                    <div class="message-bubble message-bubble-user">
+                        <div class="message-header">You</div>
+                        {msg}
+                    </div>
+                </div>
+                """
+    summary = msg[:120] + "..." if len(msg) > 120 else msg
+    return f"""
+                <div class="message message-ai">
+                    <div class="message-bubble message-bubble-ai">
+                        <div class="message-header">AI Copilot</div>
+                        {summary}
+                    </div>
+                </div>
+                """
+
+def cached_bubble_html(i, sender, msg):
+    """Bubble HTML for chat_history[i], built once per message"""
+    cached = st.session_state.bubble_html.get(i)
+    if cached is None or cached[0] is not msg:
+        cached = (msg, render_bubble_html(sender, msg))
+        st.session_state.bubble_html[i] = cached
+    return cached[1]
+
+def render_content_display(container, content):
+    container.markdown(f"""
+    <div class="content-display">
+        {content.replace(chr(10), '<br>')}
+    </div>
+    """, unsafe_allow_html=True)
 
-# File processing
-input_dir = "uploaded_input"
-os.makedirs(input_dir, exist_ok=True)
+run_timer.mark("page setup")
 
-def load_course_context():
+# File processing
+index_dir = config.INDEX_DIR
+
+@st.cache_resource
+def get_workspace_sweeper():
+    # Shared by every session, so the sweep runs at most once per interval per process
+    return WorkspaceSweeper(config.WORKSPACE_ROOT, config.WORKSPACE_TTL, config.WORKSPACE_SWEEP_INTERVAL)
+
+def session_workspace():
+    """This session's course directory, named by the ``course`` query parameter.
+
+    A new session gets a fresh ID written back into the URL, so reloading or
+    bookmarking the page reopens the same course.
+    """
+    if "workspace_dir" not in st.session_state:
+        workspace_id = st.query_params.get("course")
+        if not valid_workspace_id(workspace_id):
+            workspace_id = new_workspace_id()
+            st.query_params["course"] = workspace_id
+        st.session_state.workspace_dir = open_workspace(config.WORKSPACE_ROOT, workspace_id)
+    return st.session_state.workspace_dir
+
+# Every run checks, but sweeps happen at most once per WORKSPACE_SWEEP_INTERVAL
+get_workspace_sweeper().maybe_sweep()
+input_dir = session_workspace()
+
+@st.cache_resource
+def get_corpus_cache():
+    # Shared by every session and rerun; identical course packs share parsed documents
+    return CorpusCache(config.CORPUS_CACHE_COURSES)
+
+def load_course_corpus():
     if os.path.exists(input_dir) and os.listdir(input_dir):
         file_path = input_dir
     else:
@@ -514,32 +205,215 @@ def load_course_context():
         if os.path.exists(default_path) and os.listdir(default_path):
             file_path = default_path
         else:
-            return None, None
+            return None
     
     try:
-        documents = SimpleDirectoryReader(file_path).load_data()
-        course_context = "\n\n".join([doc.text for doc in documents])
-        return course_context, len(documents)
+        # Runs on every rerun, so its log line is DEBUG; parses are logged by the corpus cache
+        with REGISTRY.timer("documents.load", log_level=logging.DEBUG):
+            return get_corpus_cache().load(file_path)
     except Exception as e:
         st.error(f"❌ Error loading documents: {str(e)}")
-        return None, None
+        return None
+
+@st.cache_resource
+def get_embedding_store():
+    # Memory-mapped on first use; survives restarts so unchanged chunks are never re-embedded
+    return EmbeddingStore(index_dir, config.EMBED_MODEL)
+
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache(
+        os.path.join(config.CACHE_DIR, "responses.sqlite"),
+        max_entries=config.RESPONSE_CACHE_ENTRIES,
+        ttl=config.RESPONSE_CACHE_TTL,
+    )
 
-course_context, num_docs = load_course_context()
+@st.cache_resource
+def get_pdf_cache():
+    return PdfCache(max_entries=16, max_bytes=32 * 1024 * 1024)
+
+@st.cache_resource
+def get_job_queue():
+    # Process-wide worker pool for LLM work; sessions keep only job IDs
+    return JobQueue(max_workers=config.JOB_WORKERS, name="llm", finished_ttl=config.JOB_RESULT_TTL)
+
+@st.cache_resource
+def get_export_queue():
+    # One worker: layout is CPU-bound, so more threads would only contend for the GIL
+    return JobQueue(max_workers=1, name="export", finished_ttl=config.JOB_RESULT_TTL)
+
+@st.cache_resource
+def get_flowable_cache():
+    return FlowableCache(max_entries=128)
+
+def session_export_sections(chat_history):
+    sections = []
+    for i, (sender, msg) in enumerate(chat_history):
+        if sender == "ai" and not msg.startswith("❌ Error") and i > 0 and chat_history[i-1][0] == "user":
+            sections.append((chat_history[i-1][1], msg))
+    return sections
+
+@st.cache_resource
+def get_process_startup_report():
+    # Captures whichever run first reaches it, i.e. the process cold start
+    run_timer.log("process cold start")
+    return run_timer.report()
+
+@st.cache_resource
+def get_usage_log():
+    return UsageLog()
+
+@st.cache_resource
+def get_request_policy():
+    # One circuit breaker for every session: a failing provider is failing for all of them
+    return RequestPolicy(
+        retries=config.LLM_RETRIES,
+        base_delay=config.LLM_BACKOFF,
+        max_delay=config.LLM_BACKOFF_MAX,
+        deadline=config.LLM_DEADLINE,
+        hedge=config.LLM_HEDGE,
+        hedge_delay=config.LLM_HEDGE_DELAY,
+        hedge_min_samples=config.LLM_HEDGE_MIN_SAMPLES,
+        breaker=CircuitBreaker(config.BREAKER_FAILURES, config.BREAKER_RESET),
+        max_workers=2 * config.HTTP_MAX_IN_FLIGHT,
+        first_token_deadline=config.LLM_FIRST_TOKEN_DEADLINE
+    )
+
+@st.cache_resource
+def get_assistant():
+    return Assistant(
+        get_llm(openai_api_key, config.LLM_MODEL, config.LLM_TEMPERATURE, config.LLM_MAX_TOKENS, config.API_BASE),
+        get_embed_model(openai_api_key, config.EMBED_MODEL, config.API_BASE),
+        get_usage_log(), get_response_cache(), get_embedding_store(),
+        request_policy=get_request_policy()
+    )
+
+def export_session_pdf(job, sections, title, flowable_cache):
+    from pdf_export import create_session_pdf
+    with REGISTRY.timer("pdf.session", sections=len(sections)):
+        return create_session_pdf(sections, title, flowable_cache)
+
+def submit_chat_job(query, bypass_cache=False, history=None):
+    """Queue an answer to ``query`` against the current course, chat history and target module"""
+    memory = st.session_state.conversation_memory
+    if history is None:
+        history = st.session_state.chat_history
+    elif memory.summarized_upto > len(history):
+        # The running summary already covers later turns; summarize this shorter history afresh
+        memory = ConversationMemory(config.HISTORY_TOKEN_BUDGET, config.HISTORY_SUMMARY_TOKENS)
+    job_id = get_job_queue().submit(
+        "chat", query, get_assistant().answer,
+        course_corpus, query, list(history),
+        memory, bypass_cache, st.session_state.get("target_module")
+    )
+    st.session_state.chat_jobs.append(job_id)
+
+def add_finished_answer(job):
+    """Append a finished chat job's question and answer (or error) to the chat history"""
+    if job.status == DONE:
+        answer = job.result
+        st.session_state.chat_history.append(("user", answer.query))
+        st.session_state.chat_history.append(("ai", answer.content))
+        st.session_state.last_response_timing = (answer.time_to_first_token, answer.total_time, answer.cached)
+        # Auto-display longer responses in content panel
+        if len(answer.content) > 150:
+            st.session_state.current_content = answer.content
+            st.session_state.content_title = f"Response: {answer.query[:50]}..."
+    elif job.status == FAILED:
+        st.session_state.chat_history.append(("user", job.label))
+        st.session_state.chat_history.append(("ai", f"❌ Error: {str(job.error)}"))
+
+def collect_finished_chat_jobs():
+    """Move finished answers into the chat history, in submission order"""
+    queue = get_job_queue()
+    pending = list(st.session_state.chat_jobs)
+    while pending:
+        job = queue.get(pending[0])
+        if job is not None:
+            if job.active:
+                # Later answers wait for this one, so the history stays in the order it was asked
+                break
+            add_finished_answer(job)
+            queue.discard(job.id)
+        pending.pop(0)
+    st.session_state.chat_jobs = pending
+
+def submit_pack_job(per_module):
+    """Queue every Quick Action at once, for the target module or each curriculum module"""
+    outline = course_corpus.outline
+    target = outline.modules.get(st.session_state.get("target_module"))
+    if per_module:
+        modules = outline.module_titles
+    else:
+        modules = [target.title] if target is not None else []
+    st.session_state.pack_job = get_job_queue().submit(
+        "pack", "Generate all", get_assistant().generate_pack,
+        course_corpus, pack_prompts(modules), list(st.session_state.chat_history),
+        st.session_state.conversation_memory, config.PACK_CONCURRENCY
+    )
+    st.session_state.pack_collected = set()
+    st.session_state.last_pack_timing = None
+
+def collect_pack_results():
+    """Move "generate all" answers into the chat history as each one completes"""
+    queue = get_job_queue()
+    job = queue.get(st.session_state.pack_job) if st.session_state.pack_job else None
+    if job is None:
+        st.session_state.pack_job = None
+        return
+    for item in list(job.progress.values()):
+        if not item.active and item.id not in st.session_state.pack_collected:
+            st.session_state.pack_collected.add(item.id)
+            add_finished_answer(item)
+    if not job.active:
+        if job.status == DONE:
+            st.session_state.last_pack_timing = job.result
+        queue.discard(job.id)
+        st.session_state.pack_job = None
+
+course_corpus = load_course_corpus()
+course_context = course_corpus.context if course_corpus else None
+num_docs = len(course_corpus.documents) if course_corpus else None
+run_timer.mark("corpus")
 
 # Initialize session state
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
-if "processing_query" not in st.session_state:
-    st.session_state.processing_query = False
+if "chat_jobs" not in st.session_state:
+    st.session_state.chat_jobs = []
+if "pack_job" not in st.session_state:
+    st.session_state.pack_job = None
+    st.session_state.pack_collected = set()
+if "last_pack_timing" not in st.session_state:
+    st.session_state.last_pack_timing = None
+if "upload_signature" not in st.session_state:
+    st.session_state.upload_signature = None
+    st.session_state.upload_result = None
+if "generation_job" not in st.session_state:
+    st.session_state.generation_job = None
 if "current_content" not in st.session_state:
     st.session_state.current_content = None
 if "content_title" not in st.session_state:
     st.session_state.content_title = ""
+if "last_response_timing" not in st.session_state:
+    st.session_state.last_response_timing = None
+if "session_export" not in st.session_state:
+    st.session_state.session_export = None
+if "visible_messages" not in st.session_state:
+    st.session_state.visible_messages = config.CHAT_PAGE_SIZE
+if "bubble_html" not in st.session_state:
+    st.session_state.bubble_html = {}
+if "conversation_memory" not in st.session_state:
+    st.session_state.conversation_memory = ConversationMemory(config.HISTORY_TOKEN_BUDGET, config.HISTORY_SUMMARY_TOKENS)
+
+collect_finished_chat_jobs()
+collect_pack_results()
 
 # Main app layout
 st.markdown('<div class="main-container">', unsafe_allow_html=True)
 
-if course_context is None:
+# Stay on the setup screen until a generation run is acknowledged, even once its first file lands
+if course_context is None or st.session_state.generation_job is not None:
     # Setup Screen (Based on your mockup design)
     st.markdown("""
     <div class="app-header">
@@ -595,15 +469,26 @@ if course_context is None:
             label_visibility="collapsed"
         )
         
-        if uploaded_files:
-            for file in os.listdir(input_dir):
-                os.remove(os.path.join(input_dir, file))
-            
-            for file in uploaded_files:
-                with open(os.path.join(input_dir, file.name), "wb") as f:
-                    f.write(file.read())
+        if not uploaded_files:
+            st.session_state.upload_signature = None
+        else:
+            # Reruns with the same upload set touch neither the files nor the disk
+            signature = upload_signature(uploaded_files)
+            if st.session_state.upload_signature != signature:
+                st.session_state.upload_result = save_uploads(
+                    uploaded_files, input_dir,
+                    config.UPLOAD_MAX_FILE_MB << 20, config.UPLOAD_MAX_TOTAL_MB << 20,
+                    config.UPLOAD_CHUNK_BYTES
+                )
+                st.session_state.upload_signature = signature
+                if st.session_state.upload_result.written or st.session_state.upload_result.removed:
+                    get_corpus_cache().invalidate(input_dir)
             
-            st.success("✅ Files uploaded successfully!")
+            upload_result = st.session_state.upload_result
+            for name, reason in upload_result.rejected:
+                st.error(f"❌ {name} was not uploaded: {reason}")
+            if upload_result.written or upload_result.unchanged:
+                st.success("✅ Files uploaded successfully!")
             if st.button("🚀 Start Teaching", type="primary", use_container_width=True):
                 st.rerun()
     
@@ -622,73 +507,53 @@ if course_context is None:
         label_visibility="collapsed"
     )
     
-    if st.button("🚀 Generate Course Files", type="primary", use_container_width=True):
+    generation_job = get_job_queue().get(st.session_state.generation_job) if st.session_state.generation_job else None
+    
+    if st.button("🚀 Generate Course Files", type="primary", use_container_width=True, disabled=bool(generation_job and generation_job.active)):
         if course_description.strip():
-            with st.spinner("🤖 Creating your course files..."):
-                try:
-                    # Generate curriculum
-                    curriculum_prompt = f"""Create a detailed curriculum.md file for this course: {course_description}
-                    
-                    Format it as a proper markdown file with sections for:
-                    - Course Title
-                    - Course Description  
-                    - Learning Objectives
-                    - Prerequisites
-                    - Course Modules (with topics and key concepts)
-                    - Assessment Methods
-                    - Resources
-                    - Course Schedule
-                    
-                    Make it comprehensive and well-structured."""
-                    
-                    curriculum_messages = [
-                        ChatMessage(role="system", content="You are an expert curriculum designer. Create detailed, practical curriculum files."),
-                        ChatMessage(role="user", content=curriculum_prompt)
-                    ]
-                    
-                    curriculum_response = llm.chat(curriculum_messages)
-                    
-                    # Generate pedagogy
-                    pedagogy_prompt = f"""Create a detailed pedagogy.md file for this course: {course_description}
-                    
-                    Format it as a proper markdown file with sections for:
-                    - Teaching Philosophy
-                    - Target Audience
-                    - Learning Styles Accommodation
-                    - Teaching Methods
-                    - Assessment Strategies
-                    - Engagement Techniques
-                    - Technology Integration
-                    - Differentiation Strategies
-                    - Classroom Management
-                    - Support Resources
-                    
-                    Make it practical and actionable for instructors."""
-                    
-                    pedagogy_messages = [
-                        ChatMessage(role="system", content="You are an expert in educational pedagogy. Create detailed, practical teaching guides."),
-                        ChatMessage(role="user", content=pedagogy_prompt)
-                    ]
-                    
-                    pedagogy_response = llm.chat(pedagogy_messages)
-                    
-                    # Save generated files
-                    with open(os.path.join(input_dir, "curriculum.md"), "w", encoding="utf-8") as f:
-                        f.write(curriculum_response.message.content)
-                    
-                    with open(os.path.join(input_dir, "pedagogy.md"), "w", encoding="utf-8") as f:
-                        f.write(pedagogy_response.message.content)
-                    
-                    st.success("✅ Course files generated successfully!")
-                    if st.button("🚀 Start Teaching", type="primary", use_container_width=True, key="start_after_gen"):
-                        st.rerun()
-                        
-                except Exception as e:
-                    st.error(f"❌ Error generating files: {str(e)}. Please check your OpenAI API key.")
+            # Both files are requested concurrently on a worker; each is saved as soon as it lands
+            corpus_cache = get_corpus_cache()
+            st.session_state.generation_job = get_job_queue().submit(
+                "generate", course_description, get_assistant().generate_course_files,
+                course_description, input_dir,
+                lambda file_name: corpus_cache.invalidate(input_dir)
+            )
+            st.rerun()
         else:
             st.warning("⚠️ Please describe your course first.")
     
+    if generation_job is not None:
+        for file_name, state in generation_job.progress.items():
+            if state == "generating":
+                st.info(f"⏳ Generating {file_name}...")
+            else:
+                st.success(f"✅ {file_name} ready ({state:.1f}s)")
+        
+        if generation_job.active:
+            if st.button("✖️ Cancel", use_container_width=True, key="cancel_generation"):
+                get_job_queue().cancel(generation_job.id)
+                st.rerun()
+        elif generation_job.status == DONE:
+            st.success("✅ Course files generated successfully!")
+            if st.button("🚀 Start Teaching", type="primary", use_container_width=True, key="start_after_gen"):
+                get_job_queue().discard(generation_job.id)
+                st.session_state.generation_job = None
+                st.rerun()
+        else:
+            if generation_job.status == FAILED:
+                st.error(f"❌ Error generating files: {str(generation_job.error)}. Please check your OpenAI API key.")
+            get_job_queue().discard(generation_job.id)
+            st.session_state.generation_job = None
+    elif st.session_state.generation_job is not None:
+        # The job is gone (e.g. the server restarted); fall back to normal routing
+        st.session_state.generation_job = None
+        st.rerun()
+    
     st.markdown('</div>', unsafe_allow_html=True)
+    
+    if generation_job is not None and generation_job.active:
+        time.sleep(config.JOB_POLL_INTERVAL)
+        st.rerun()
 
 else:
     # Chat Interface (Based on your two-panel mockup)
@@ -715,53 +580,93 @@ else:
     </div>
     """, unsafe_allow_html=True)
     
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("📚 Lesson Plan", disabled=st.session_state.processing_query, use_container_width=True, key="btn_lesson"):
-            st.session_state.next_query = "Create a detailed lesson plan for module 1"
-            st.rerun()
-        if st.button("🎯 Activities", disabled=st.session_state.processing_query, use_container_width=True, key="btn_activities"):
-            st.session_state.next_query = "Suggest interactive activities to engage students"
-            st.rerun()
-    with col2:
-        if st.button("❓ Quiz Questions", disabled=st.session_state.processing_query, use_container_width=True, key="btn_quiz"):
-            st.session_state.next_query = "Generate 10 quiz questions for this module"
-            st.rerun()
-        if st.button("📝 Assignment", disabled=st.session_state.processing_query, use_container_width=True, key="btn_assignment"):
-            st.session_state.next_query = "Create an assignment for this module"
+    # Target module: prompts then carry only that module's curriculum section
+    course_modules = course_corpus.outline.modules
+    if course_modules:
+        st.selectbox(
+            "🎯 Target module",
+            [None] + sorted(course_modules),
+            format_func=lambda number: "Whole course" if number is None else course_modules[number].title,
+            key="target_module"
+        )
+    target_module = course_modules.get(st.session_state.get("target_module"))
+    
+    action_columns = st.columns(2)
+    for n, (label, key, prompt, module_prompt) in enumerate(QUICK_ACTIONS):
+        with action_columns[n % 2]:
+            if st.button(label, use_container_width=True, key=key):
+                submit_chat_job(module_prompt.format(module=target_module.title) if target_module else prompt)
+                st.rerun()
+    
+    # Generate All: every Quick Action at once, optionally per curriculum module
+    pack_job = get_job_queue().get(st.session_state.pack_job) if st.session_state.pack_job else None
+    col_pack, col_modules = st.columns([1, 1])
+    with col_modules:
+        per_module = st.checkbox("For every module", key="pack_per_module", disabled=not course_modules)
+    with col_pack:
+        if st.button("🚀 Generate All", use_container_width=True, key="btn_pack", disabled=pack_job is not None):
+            submit_pack_job(per_module)
             st.rerun()
     
     # Chat Messages
     st.markdown('<div class="chat-messages">', unsafe_allow_html=True)
     
     if st.session_state.chat_history:
-        for i, (sender, msg) in enumerate(st.session_state.chat_history):
-            if sender == "user":
-                st.markdown(f"""
-                <div class="message message-user">
-                    <div class="message-bubble message-bubble-user">
-                        <div class="message-header">You</div>
-                        {msg}
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                summary = msg[:120] + "..." if len(msg) > 120 else msg
-                st.markdown(f"""
-                <div class="message message-ai">
-                    <div class="message-bubble message-bubble-ai">
-                        <div class="message-header">AI Copilot</div>
-                        {summary}
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+        # Only the latest page(s) are rendered; older messages load on demand
+        first_visible = max(0, len(st.session_state.chat_history) - st.session_state.visible_messages)
+        if first_visible:
+            if st.button(f"⬆️ Show earlier messages ({first_visible} hidden)", use_container_width=True, key="show_earlier"):
+                st.session_state.visible_messages += config.CHAT_PAGE_SIZE
+                st.rerun()
+        
+        # Consecutive bubbles go out as one markdown element, flushed before each button
+        pending_html = []
+        for i in range(first_visible, len(st.session_state.chat_history)):
+            sender, msg = st.session_state.chat_history[i]
+            pending_html.append(cached_bubble_html(i, sender, msg))
+            if sender != "user":
+                st.markdown("".join(pending_html), unsafe_allow_html=True)
+                pending_html = []
                 
                 if len(msg) > 120:
                     if st.button("📄 View Full Content", key=f"view_{i}", use_container_width=True):
                         st.session_state.current_content = msg
                         st.session_state.content_title = f"Response to: {st.session_state.chat_history[i-1][1][:50]}..."
                         st.rerun()
-    else:
+                
+                if i > 0 and st.session_state.chat_history[i-1][0] == "user":
+                    if st.button("🔄 Regenerate", key=f"regen_{i}", use_container_width=True):
+                        # Re-ask the same question with only the turns before it, skipping the response cache
+                        submit_chat_job(st.session_state.chat_history[i-1][1], bypass_cache=True,
+                                        history=st.session_state.chat_history[:i-1])
+                        st.rerun()
+        if pending_html:
+            st.markdown("".join(pending_html), unsafe_allow_html=True)
+    
+    # Queued and running requests, answered in the background; finished ones wait for earlier questions
+    for job_id in st.session_state.chat_jobs:
+        job = get_job_queue().get(job_id)
+        if job is None:
+            continue
+        if not job.active:
+            state = "✅ Answered, shown after the questions before it"
+        else:
+            state = "⏳ Queued" if job.started is None else f"🤖 Generating... {job.elapsed:.0f}s"
+        st.markdown(render_bubble_html("user", job.label) + f'<div class="message-header">{state}</div>', unsafe_allow_html=True)
+        if job.active and st.button("✖️ Cancel", key=f"cancel_{job_id}", use_container_width=True):
+            get_job_queue().cancel(job_id)
+            st.rerun()
+    
+    if pack_job is not None:
+        finished = sum(1 for item in list(pack_job.progress.values()) if not item.active)
+        total = len(pack_job.progress)
+        st.progress(finished / total if total else 0.0,
+                    text=f"🚀 Generating all: {finished}/{total} done · {pack_job.elapsed:.0f}s")
+        if st.button("✖️ Cancel Generate All", key="cancel_pack", use_container_width=True):
+            get_job_queue().cancel(pack_job.id)
+            st.rerun()
+    
+    if not st.session_state.chat_history and not st.session_state.chat_jobs and pack_job is None:
         st.markdown("""
         <div class="welcome-message">
             <h3>👋 Welcome to Teach Assist!</h3>
@@ -780,16 +685,18 @@ else:
             user_input = st.text_input(
                 "Type your message:",
                 placeholder="Ask about lesson plans, quizzes, activities...",
-                disabled=st.session_state.processing_query,
                 label_visibility="collapsed"
             )
         with col_send:
             submit_button = st.form_submit_button(
                 "Send",
-                disabled=st.session_state.processing_query,
                 use_container_width=True
             )
     
+    if submit_button and user_input:
+        submit_chat_job(user_input)
+        st.rerun()
+    
     # Settings button
     with st.popover("⚙️"):
         st.markdown("**Course Management:**")
@@ -800,10 +707,80 @@ else:
                         os.remove(os.path.join(input_dir, file))
                     except:
                         pass
+            get_corpus_cache().invalidate(input_dir)
+            # Jobs still winding down after the cancel are evicted once finished (JOB_RESULT_TTL)
+            for job_id in st.session_state.chat_jobs + [st.session_state.pack_job]:
+                if job_id:
+                    get_job_queue().cancel(job_id)
+                    get_job_queue().discard(job_id)
+            if st.session_state.session_export:
+                get_export_queue().cancel(st.session_state.session_export)
+                get_export_queue().discard(st.session_state.session_export)
+            st.session_state.chat_jobs = []
+            st.session_state.pack_job = None
+            st.session_state.last_pack_timing = None
             st.session_state.chat_history = []
             st.session_state.current_content = None
             st.session_state.content_title = ""
-            st.session_state.processing_query = False
+            st.session_state.session_export = None
+            st.session_state.conversation_memory.reset()
+            st.session_state.visible_messages = config.CHAT_PAGE_SIZE
+            st.session_state.bubble_html = {}
+            st.rerun()
+        
+        st.markdown("**Usage:**")
+        usage_summary = get_usage_log().summary()
+        if usage_summary:
+            for kind, usage in usage_summary.items():
+                st.caption(
+                    f"{kind}: {usage['requests']} requests ({usage['cached']} cached) · "
+                    f"{usage['prompt_tokens']:,} prompt / {usage['completion_tokens']:,} completion tokens · "
+                    f"{usage['mean_latency']:.2f}s avg · "
+                    f"{usage['prompt_cache_hit_rate']:.0%} of prompt tokens from provider cache"
+                )
+            _, pool_stats = get_http_pool()
+            pool = pool_stats.snapshot()
+            st.caption(
+                f"connections: {pool['in_flight']}/{config.HTTP_MAX_IN_FLIGHT} in flight (peak {pool['peak_in_flight']}) · "
+                f"{pool['waiting']} waiting · {pool['requests']} requests, {pool['errors']} errors · "
+                f"{pool['mean_wait'] * 1000:.0f}ms avg wait"
+            )
+            st.caption(f"provider prompt cache: {get_usage_log().prompt_cache_hit_rate():.0%} of all prompt tokens")
+            counters = REGISTRY.counters()
+            st.caption(
+                f"requests: circuit {get_request_policy().breaker.state} · {counters.get('llm.retry', 0)} retries · "
+                f"{counters.get('llm.hedge.launched', 0)} hedged ({counters.get('llm.hedge.won', 0)} won) · "
+                f"{counters.get('llm.deadline_exceeded', 0)} past deadline"
+            )
+        else:
+            st.caption("No LLM requests yet")
+        if st.session_state.get("startup_report"):
+            st.caption(f"startup (this session): {st.session_state.startup_report}")
+            st.caption(f"startup (process): {get_process_startup_report()}")
+        
+        st.markdown("**Export:**")
+        export_sections = session_export_sections(st.session_state.chat_history)
+        session_export = get_export_queue().get(st.session_state.session_export) if st.session_state.session_export else None
+        if session_export and session_export.status == DONE:
+            st.download_button(
+                "📥 Download Session PDF",
+                data=session_export.result.getvalue(),
+                file_name=f"teach_assist_session_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                mime="application/pdf",
+                use_container_width=True
+            )
+        elif session_export and session_export.status == FAILED:
+            st.error(f"PDF Error: {str(session_export.error)}")
+        elif session_export and session_export.active:
+            st.info("⏳ Building session PDF...")
+        if st.button(f"📚 Export Session ({len(export_sections)} items)", disabled=not export_sections or bool(session_export and session_export.active), use_container_width=True):
+            # Rendered on the export worker so chatting continues while it builds
+            if session_export:
+                get_export_queue().discard(session_export.id)
+            st.session_state.session_export = get_export_queue().submit(
+                "export", "Teach Assist Session", export_session_pdf,
+                export_sections, "Teach Assist Session", get_flowable_cache()
+            )
             st.rerun()
     
     st.markdown('</div>', unsafe_allow_html=True)
@@ -822,30 +799,61 @@ else:
     
     with col_download:
         if st.session_state.current_content:
-            try:
-                pdf_buffer = create_pdf_from_content(
-                    st.session_state.current_content, 
-                    st.session_state.content_title
-                )
+            # Render only on request; later reruns reuse the cached bytes
+            pdf_key = PdfCache.key(st.session_state.current_content, st.session_state.content_title)
+            pdf_bytes = get_pdf_cache().get(pdf_key)
+            if pdf_bytes is None:
+                if st.button("📄 Prepare PDF", use_container_width=True, key="prepare_pdf"):
+                    try:
+                        from pdf_export import create_pdf_from_content
+                        with REGISTRY.timer("pdf.render", chars=len(st.session_state.current_content)):
+                            pdf_bytes = create_pdf_from_content(
+                                st.session_state.current_content, 
+                                st.session_state.content_title
+                            ).getvalue()
+                        get_pdf_cache().put(pdf_key, pdf_bytes)
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"PDF Error: {str(e)}")
+            else:
                 st.download_button(
                     "Download PDF",
-                    data=pdf_buffer,
+                    data=pdf_bytes,
                     file_name=f"teach_assist_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
                     mime="application/pdf",
                     use_container_width=True
                 )
-            except Exception as e:
-                st.error(f"PDF Error: {str(e)}")
+    
+    if st.session_state.last_response_timing:
+        time_to_first_token, total_time, cached = st.session_state.last_response_timing
+        if cached:
+            st.caption(f"💾 Served from cache in {total_time:.2f}s")
+        elif time_to_first_token is None:
+            st.caption(f"⏱️ Response in {total_time:.2f}s")
+        else:
+            st.caption(f"⚡ First token in {time_to_first_token:.2f}s · ⏱️ Total {total_time:.2f}s")
+    
+    if st.session_state.last_pack_timing:
+        answered, wall_time, sequential_time = st.session_state.last_pack_timing
+        speedup = sequential_time / wall_time if wall_time else 1.0
+        st.caption(f"🚀 {answered} items in {wall_time:.1f}s wall time vs {sequential_time:.1f}s sequential ({speedup:.1f}× faster)")
     
     # Content Area
     st.markdown('<div class="content-area">', unsafe_allow_html=True)
     
-    if st.session_state.current_content:
-        st.markdown(f"""
-        <div class="content-display">
-            {st.session_state.current_content.replace(chr(10), '<br>')}
-        </div>
-        """, unsafe_allow_html=True)
+    # While an answer streams in, show the newest running request's partial text
+    streaming_job = None
+    for job_id in reversed(st.session_state.chat_jobs):
+        job = get_job_queue().get(job_id)
+        if job is not None and job.active and job.partial:
+            streaming_job = job
+            break
+    
+    if streaming_job is not None:
+        st.caption(f"🤖 Generating: {streaming_job.label[:50]}...")
+        render_content_display(st, streaming_job.partial)
+    elif st.session_state.current_content:
+        render_content_display(st, st.session_state.current_content)
     else:
         st.markdown("""
         <div class="content-placeholder">
@@ -862,51 +870,20 @@ else:
     st.markdown('</div>', unsafe_allow_html=True)
     st.markdown('</div>', unsafe_allow_html=True)
     
-    # Handle queued queries and form submission
-    if "next_query" in st.session_state:
-        user_input = st.session_state.next_query
-        del st.session_state.next_query
-        submit_button = True
-    
-    # Process query
-    if submit_button and user_input and not st.session_state.processing_query:
-        st.session_state.processing_query = True
-        st.session_state.chat_history.append(("user", user_input))
-        
-        with st.spinner("🤖 Generating response..."):
-            try:
-                system_prompt = f"""You are Teach Assist, an AI-powered teaching companion designed to help instructors create engaging lesson plans, teaching materials, and educational content.
-
-                COURSE CONTEXT:
-                {course_context}
-                
-                Based on the curriculum and pedagogy information above, help the instructor with their request. 
-                Be specific, practical, and reference the course content when relevant.
-                Create detailed, actionable responses that instructors can use immediately.
-                
-                For longer content like lesson plans, quizzes, or assignments, provide comprehensive, well-structured responses with clear formatting."""
-                
-                messages = [
-                    ChatMessage(role="system", content=system_prompt),
-                    ChatMessage(role="user", content=user_input)
-                ]
-                
-                response = llm.chat(messages)
-                response_content = response.message.content
-                
-                st.session_state.chat_history.append(("ai", response_content))
-                
-                # Auto-display longer responses in content panel
-                if len(response_content) > 150:
-                    st.session_state.current_content = response_content
-                    st.session_state.content_title = f"Response: {user_input[:50]}..."
-                
-                st.session_state.processing_query = False
-                st.rerun()
-                
-            except Exception as e:
-                st.session_state.chat_history.append(("ai", f"❌ Error: {str(e)}"))
-                st.session_state.processing_query = False
-                st.rerun()
-
-st.markdown('</div>', unsafe_allow_html=True)
\ No newline at end of file
+    # Poll background jobs so finished answers and exports show up without a click
+    if st.session_state.chat_jobs or pack_job is not None or (session_export and session_export.active):
+        # st.rerun() ends this run before the bottom of the script, so it is timed here, without the wait
+        run_timer.mark("render")
+        REGISTRY.observe("rerun", run_timer.total, log_level=logging.DEBUG)
+        time.sleep(config.JOB_POLL_INTERVAL)
+        st.rerun()
+
+st.markdown('</div>', unsafe_allow_html=True)
+
+# Startup timing: the process's first run carries the import cost, a session's first run its cache warm-up
+run_timer.mark("render")
+REGISTRY.observe("rerun", run_timer.total, log_level=logging.DEBUG)
+get_process_startup_report()
+if "startup_report" not in st.session_state:
+    st.session_state.startup_report = run_timer.report()
+    run_timer.log("session first run")
\ No newline at end of file
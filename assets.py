@@ -0,0 +1,40 @@
+"""Static assets (stylesheet, Markdown templates) read once per process."""
+import os
+import threading
+
+
+class AssetCache:
+    """Keeps file contents in memory after the first read.
+
+    With ``reload`` set, as in development, every read stats the file and
+    re-reads it if its mtime changed; otherwise the disk is not touched again.
+    """
+
+    def __init__(self, reload=False):
+        self.reload = reload
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def read(self, path):
+        """Return the file's text, or None if it does not exist."""
+        return self._entry(path)[1]
+
+    def version(self, path):
+        """Changes whenever the cached text does; used to bust browser caches."""
+        return self._entry(path)[0]
+
+    def _entry(self, path):
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and not self.reload:
+                return entry
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                self._entries.pop(path, None)
+                return 0, None
+            if entry is None or entry[0] != mtime_ns:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = (mtime_ns, f.read())
+                self._entries[path] = entry
+            return entry
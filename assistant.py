@@ -0,0 +1,344 @@
+"""Chat answering and course-file generation for Teach Assist.
+
+These run on background job workers, so nothing here touches ``st``;
+progress is reported through the ``Job`` handle instead.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import closing
+from itertools import chain
+
+import config
+from jobs import DONE, JobCancelled
+from metrics import REGISTRY
+from prompts import COURSE_FILE_PROMPTS, chat_system_prompt, course_file_prompt, summary_prompt
+from resilience import is_retryable
+from response_cache import make_cache_key
+from retrieval import ChunkIndex, estimate_tokens
+from tokens import (
+    completion_budget,
+    context_window,
+    count_message_tokens,
+    count_tokens,
+    fit_context,
+    response_usage,
+)
+
+logger = logging.getLogger("teach_assist.assistant")
+
+ChatRequest = namedtuple("ChatRequest", ["messages", "system_prompt", "history", "prompt_tokens", "max_tokens"])
+ChatAnswer = namedtuple("ChatAnswer", ["query", "content", "time_to_first_token", "total_time", "cached"])
+PackTiming = namedtuple("PackTiming", ["answered", "wall_time", "sequential_time"])
+
+# (button label, widget key, prompt, prompt for one named module)
+QUICK_ACTIONS = [
+    ("📚 Lesson Plan", "btn_lesson", "Create a detailed lesson plan for module 1",
+     "Create a detailed lesson plan for {module}"),
+    ("❓ Quiz Questions", "btn_quiz", "Generate 10 quiz questions for this module",
+     "Generate 10 quiz questions for {module}"),
+    ("🎯 Activities", "btn_activities", "Suggest interactive activities to engage students",
+     "Suggest interactive activities to engage students in {module}"),
+    ("📝 Assignment", "btn_assignment", "Create an assignment for this module",
+     "Create an assignment for {module}"),
+]
+
+def pack_prompts(modules=()):
+    """Every Quick Action prompt, once per module when ``modules`` are given."""
+    if not modules:
+        return [prompt for _, _, prompt, _ in QUICK_ACTIONS]
+    return [module_prompt.format(module=module) for module in modules for _, _, _, module_prompt in QUICK_ACTIONS]
+
+
+
+class Assistant:
+    """Holds the LLM, embedding model and caches shared by every session."""
+
+    def __init__(self, llm, embed_model, usage_log, response_cache=None, embedding_store=None, max_indexes=8,
+                 request_policy=None):
+        self.llm = llm
+        self.embed_model = embed_model
+        self.usage_log = usage_log
+        self.response_cache = response_cache
+        self.embedding_store = embedding_store
+        self.max_indexes = max_indexes
+        # Retries, deadlines, hedging and the circuit breaker for LLM calls; None calls the LLM directly
+        self.request_policy = request_policy
+        self._indexes = OrderedDict()
+        # Guards the two dicts; each build holds only its own fingerprint's lock
+        self._index_lock = threading.Lock()
+        self._build_locks = {}
+
+    # Retrieval
+
+    def use_retrieval(self, corpus):
+        if config.RETRIEVAL_MODE == "always":
+            return True
+        if config.RETRIEVAL_MODE == "off":
+            return False
+        return estimate_tokens(corpus.context) > config.FULL_CONTEXT_MAX_TOKENS
+
+    def course_index(self, corpus):
+        """Chunk index for ``corpus``, built once per corpus fingerprint.
+
+        Concurrent requests for one course wait for a single build; builds of
+        different courses run side by side.
+        """
+        fingerprint = corpus.fingerprint
+        with self._index_lock:
+            index = self._cached_index(fingerprint)
+            if index is not None:
+                return index
+            build_lock = self._build_locks.setdefault(fingerprint, threading.Lock())
+        with build_lock:
+            with self._index_lock:
+                index = self._cached_index(fingerprint)
+            if index is not None:
+                return index
+            # Only chunks missing from the store are embedded
+            store = self.embedding_store
+            with REGISTRY.timer("retrieval.index", documents=len(corpus.documents)):
+                index = ChunkIndex.build(corpus.documents, self.embed_model, config.CHUNK_TOKENS, store=store)
+            with self._index_lock:
+                self._indexes[fingerprint] = index
+                while len(self._indexes) > self.max_indexes:
+                    self._indexes.popitem(last=False)
+                self._build_locks.pop(fingerprint, None)
+                live = {chunk.sha256 for live_index in self._indexes.values() for chunk in live_index.chunks}
+            if store is not None and (len(store) > config.EMBED_STORE_MAX_CHUNKS or store.stale_rows > len(store)):
+                # Chunks of every index still in memory stay; other courses are evicted least recently used first
+                store.compact(config.EMBED_STORE_MAX_CHUNKS, config.EMBED_STORE_TTL, keep=live)
+        return index
+
+    def _cached_index(self, fingerprint):
+        index = self._indexes.get(fingerprint)
+        if index is not None:
+            self._indexes.move_to_end(fingerprint)
+        return index
+
+    def build_query_context(self, corpus, query, module=None):
+        """Return the course context to send with ``query``.
+
+        A module named in the query, or else the ``module`` number the
+        instructor selected, narrows the context to that module.
+        """
+        if config.MODULE_CONTEXT:
+            target = corpus.outline.match_module(query) or corpus.outline.modules.get(module)
+            if target is not None:
+                return corpus.outline.module_context(target, query, config.MODULE_GUIDANCE_TOKENS)
+        if not self.use_retrieval(corpus):
+            return corpus.context
+        try:
+            index = self.course_index(corpus)
+            with REGISTRY.timer("retrieval.search"):
+                context = index.select_context(query, self.embed_model, config.RETRIEVAL_TOP_K,
+                                               config.RETRIEVAL_TOKEN_BUDGET)
+        except Exception as e:
+            # Embedding failures fall back to sending the whole corpus
+            logger.warning("Retrieval failed, sending the whole course instead: %r", e)
+            REGISTRY.increment("retrieval.fallback")
+            return corpus.context
+        return context or corpus.context
+
+    # Prompt assembly
+
+    def budget_messages(self, system_prompt, user_prompt, history=()):
+        """Count prompt tokens and pick ``max_tokens`` from the model's remaining window"""
+        # Imported on first use so the setup screen never pays for LlamaIndex
+        from llama_index.core.llms import ChatMessage
+        messages = [
+            ChatMessage(role="system", content=system_prompt),
+            *history,
+            ChatMessage(role="user", content=user_prompt)
+        ]
+        prompt_tokens = count_message_tokens(messages, self.llm.model)
+        return messages, prompt_tokens, completion_budget(prompt_tokens, self.llm.model, config.LLM_MAX_TOKENS)
+
+    def summarize_turns(self, previous_summary, turns, max_tokens):
+        """Fold conversation turns into the running summary with a short LLM call"""
+        messages, prompt_tokens, _ = self.budget_messages(*summary_prompt(previous_summary, turns))
+        start = time.perf_counter()
+        response = self._chat("summary", messages, max_tokens)
+        self._record("summary", response, prompt_tokens, max_tokens, time.perf_counter() - start,
+                     response.message.content)
+        return response.message.content
+
+    def prepare_chat(self, corpus, user_input, chat_history, memory, module=None):
+        """Assemble a ChatRequest, trimming course context to fit the context window.
+
+        ``chat_history`` holds the earlier turns, replayed through the
+        session's conversation ``memory``.
+        """
+        model = self.llm.model
+        with REGISTRY.timer("prompt.assemble") as fields:
+            history = memory.messages(chat_history, model, self.summarize_turns)
+            query_context = self.build_query_context(corpus, user_input, module)
+            system_prompt = chat_system_prompt(query_context)
+            messages, prompt_tokens, max_tokens = self.budget_messages(system_prompt, user_input, history)
+            if prompt_tokens + config.LLM_MAX_TOKENS > context_window(model):
+                other_tokens = prompt_tokens - count_tokens(query_context, model)
+                query_context = fit_context(query_context, other_tokens, model, config.LLM_MAX_TOKENS)
+                system_prompt = chat_system_prompt(query_context)
+                messages, prompt_tokens, max_tokens = self.budget_messages(system_prompt, user_input, history)
+            fields["prompt_tokens"] = prompt_tokens
+        return ChatRequest(messages, system_prompt, history, prompt_tokens, max_tokens)
+
+    # Answering
+
+    def answer(self, job, corpus, user_input, chat_history, memory, bypass_cache=False, module=None):
+        """Answer ``user_input``, streaming partial text into ``job.partial``."""
+        request = self.prepare_chat(corpus, user_input, chat_history, memory, module)
+        job.raise_if_cancelled()
+
+        start = time.perf_counter()
+        cache = self.response_cache if config.RESPONSE_CACHE_ENABLED else None
+        cache_key = make_cache_key(
+            self.llm.model, self.llm.temperature, request.max_tokens, request.system_prompt, user_input,
+            [(message.role, message.content) for message in request.history]
+        )
+        if cache is not None and not bypass_cache:
+            cached_response = cache.get(cache_key)
+            REGISTRY.increment("response_cache.miss" if cached_response is None else "response_cache.hit")
+            if cached_response is not None:
+                total_time = time.perf_counter() - start
+                self.usage_log.record("chat", self.llm.model, 0, 0, request.max_tokens, total_time, cached=True)
+                return ChatAnswer(user_input, cached_response, None, total_time, True)
+
+        if config.STREAM_RESPONSES:
+            content, time_to_first_token = "", None
+            # With include_usage the final chunk reports token usage, including cached prompt tokens
+            stream_kwargs = {"stream_options": {"include_usage": True}} if config.STREAM_USAGE else {}
+
+            def stream():
+                nonlocal content, time_to_first_token
+                last_chunk = None
+                chunks = iter(self.llm.stream_chat(request.messages, max_tokens=request.max_tokens, **stream_kwargs))
+                with REGISTRY.timer("llm.stream", ignore=(JobCancelled,), model=self.llm.model):
+                    # Waits at most the first-token deadline; a stream that has not started is retried
+                    first = self._first_chunk(chunks, job)
+                    if first is None:
+                        return None
+                    # Closing the generator on cancel drops the HTTP response, which frees its pool slot
+                    with closing(chunks):
+                        for chunk in chain([first], chunks):
+                            job.raise_if_cancelled()
+                            last_chunk = chunk
+                            if chunk.delta:
+                                if time_to_first_token is None:
+                                    time_to_first_token = time.perf_counter() - start
+                                    REGISTRY.observe("llm.first_token", time_to_first_token, model=self.llm.model)
+                                content = chunk.message.content
+                                job.partial = content
+                return last_chunk
+
+            # Only a stream that broke before its first token is retried; a flowing stream is never cut
+            last_chunk = self._call("llm.stream", stream, job, hedge=False, enforce_deadline=False,
+                                    should_retry=lambda error: not content and is_retryable(error))
+            total_time = time.perf_counter() - start
+            self._record("chat", last_chunk, request.prompt_tokens, request.max_tokens, total_time, content)
+        else:
+            response = self._chat("chat", request.messages, request.max_tokens, job)
+            content = response.message.content
+            time_to_first_token = None
+            total_time = time.perf_counter() - start
+            self._record("chat", response, request.prompt_tokens, request.max_tokens, total_time, content)
+
+        if cache is not None:
+            cache.put(cache_key, content)
+        return ChatAnswer(user_input, content, time_to_first_token, total_time, False)
+
+    def generate_pack(self, job, corpus, prompts, chat_history, memory, concurrency):
+        """Answer all ``prompts`` concurrently, at most ``concurrency`` at a time.
+
+        Each prompt runs as a child job published in ``job.progress``, so
+        finished answers can be collected while the rest are still running.
+        """
+        items = []
+        for n, prompt in enumerate(prompts, 1):
+            items.append(job.child(n, "chat", prompt))
+            job.progress[prompt] = items[-1]
+
+        start = time.perf_counter()
+        pool = ThreadPoolExecutor(max_workers=max(1, concurrency))
+        try:
+            # Rate limits and other transient errors are retried by the request policy inside answer()
+            futures = [
+                pool.submit(item.run, self.answer, corpus, item.label, chat_history, memory)
+                for item in items
+            ]
+            for future in as_completed(futures):
+                future.result()
+                job.raise_if_cancelled()
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        answered = [item.result for item in items if item.status == DONE]
+        return PackTiming(len(answered), time.perf_counter() - start,
+                          sum(answer.total_time for answer in answered))
+
+    # Course generation
+
+    def generate_course_files(self, job, description, output_dir, on_file_written=None):
+        """Generate every course file concurrently, writing each as soon as it lands.
+
+        Per-file state ("generating", or the seconds it took) is published in
+        ``job.progress``; returns the written file names.
+        """
+        requests = {}
+        for file_name in COURSE_FILE_PROMPTS:
+            requests[file_name] = self.budget_messages(*course_file_prompt(file_name, description))
+            job.progress[file_name] = "generating"
+
+        start = time.perf_counter()
+        written = []
+        pool = ThreadPoolExecutor(max_workers=len(requests))
+        try:
+            futures = {
+                pool.submit(self._chat, "generate", messages, max_tokens, job): file_name
+                for file_name, (messages, _, max_tokens) in requests.items()
+            }
+            for future in as_completed(futures):
+                job.raise_if_cancelled()
+                file_name = futures[future]
+                response = future.result()
+                _, prompt_tokens, max_tokens = requests[file_name]
+                self._record("generate", response, prompt_tokens, max_tokens, time.perf_counter() - start,
+                             response.message.content)
+                with open(os.path.join(output_dir, file_name), "w", encoding="utf-8") as f:
+                    f.write(response.message.content)
+                if on_file_written is not None:
+                    on_file_written(file_name)
+                job.progress[file_name] = time.perf_counter() - start
+                written.append(file_name)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+        return written
+
+    def _chat(self, kind, messages, max_tokens, job=None):
+        def chat():
+            with REGISTRY.timer(f"llm.{kind}", model=self.llm.model):
+                return self.llm.chat(messages, max_tokens=max_tokens)
+        return self._call(f"llm.{kind}", chat, job)
+
+    def _first_chunk(self, chunks, job):
+        if self.request_policy is None:
+            return next(chunks, None)
+        return self.request_policy.first_item(chunks, job)
+
+    def _call(self, op, fn, job=None, **kwargs):
+        if self.request_policy is None:
+            return fn()
+        return self.request_policy.call(op, fn, job, **kwargs)
+
+    def _record(self, kind, response, prompt_tokens, max_tokens, latency, content):
+        """Log usage, preferring the provider's token counts over our own estimates."""
+        reported_prompt, reported_completion, cached_prompt = response_usage(response)
+        self.usage_log.record(
+            kind, self.llm.model,
+            reported_prompt or prompt_tokens,
+            reported_completion or count_tokens(content, self.llm.model),
+            max_tokens, latency, cached_prompt_tokens=cached_prompt or 0
+        )
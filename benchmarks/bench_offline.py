@@ -0,0 +1,245 @@
+"""Benchmark the app's core paths offline, against the stand-in OpenAI server.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_offline [--files 1 10 100 500] [--queries 24] [--json report.json]
+
+For each synthetic course pack size this times corpus loading (cold and
+warm), building the retrieval index, prompt assembly, chat answers,
+course-file generation and session PDF export, with the model calls served
+by ``benchmarks.fake_openai``. The report gives throughput, latency
+percentiles and the process's resident memory after each stage; save it
+with ``--json`` and compare runs to catch regressions before deploying.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from assistant import Assistant, pack_prompts
+from benchmarks.fake_openai import add_server_arguments, server_from_arguments
+from corpus import CorpusCache
+from embedding_store import EmbeddingStore
+from jobs import FAILED, Job
+from memory import ConversationMemory
+from metrics import percentile
+from pdf_cache import FlowableCache
+from resilience import CircuitBreaker, RequestPolicy
+from tokens import UsageLog
+
+CURRICULUM = """# Course Title: Applied Data Science {n}
+
+## Course Description
+A practical course on analysing data with Python, from cleaning to modelling.
+
+## Learning Objectives
+- Clean and explore tabular data
+- Build and evaluate predictive models
+- Communicate findings to non-technical audiences
+
+## Course Modules
+{modules}
+## Assessment Methods
+Weekly labs (40%), a midterm project (25%) and a final project (35%).
+"""
+
+MODULE = """
+### Module {n}: {topic}
+- Key concepts: {topic} fundamentals, worked examples and common pitfalls
+- Lab: apply {topic} to the course dataset and discuss the results
+- Reading: chapter {n} of the course notes
+"""
+
+PEDAGOGY = """# Pedagogy
+
+## Teaching Philosophy
+Students learn by doing: every session pairs a short explanation with a hands-on lab.
+
+## Assessment Strategies
+Use low-stakes quizzes each week and rubric-based feedback on projects.
+
+## Engagement Techniques
+Think-pair-share, live coding and short group discussions of failure cases.
+"""
+
+NOTES = """# Lecture notes {n}: {topic}
+
+{paragraphs}
+"""
+
+PARAGRAPH = ("Module {module} revisits {topic} with a new dataset. Students compare two approaches, record "
+             "their assumptions and present the trade-offs to the group. Instructors should circulate during the "
+             "lab, ask probing questions and collect common misconceptions for the next session's warm-up.")
+
+TOPICS = ["Data Cleaning", "Exploratory Analysis", "Visualisation", "Regression", "Classification",
+          "Model Evaluation", "Feature Engineering", "Clustering", "Time Series", "Text Data", "Ethics",
+          "Communicating Results"]
+
+GENERAL_QUERIES = [
+    "How should I assess group projects fairly?",
+    "Suggest a warm-up activity about common misconceptions",
+    "What are good discussion questions about trade-offs between approaches?",
+]
+
+COURSE_DESCRIPTION = "An introductory applied data science course for second-year undergraduates, 12 weeks."
+
+
+def write_pack(directory, files):
+    """Write a course pack of ``files`` Markdown files: curriculum, pedagogy and lecture notes."""
+    modules = "".join(MODULE.format(n=n, topic=topic) for n, topic in enumerate(TOPICS, 1))
+    pack = {"curriculum.md": CURRICULUM.format(n=files, modules=modules), "pedagogy.md": PEDAGOGY}
+    for n in range(1, files - 1):
+        topic = TOPICS[n % len(TOPICS)]
+        paragraphs = "\n\n".join(PARAGRAPH.format(module=n % len(TOPICS) + 1, topic=topic) for _ in range(6))
+        pack[f"notes_{n:03d}.md"] = NOTES.format(n=n, topic=topic, paragraphs=paragraphs)
+    for name in list(pack)[:files]:
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write(pack[name])
+
+
+def rss_mb():
+    """Current resident set size, or the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2 ** 20
+
+
+def row(files, stage, durations, wall_time=None):
+    durations = sorted(durations)
+    wall_time = sum(durations) if wall_time is None else wall_time
+    return {
+        "files": files,
+        "stage": stage,
+        "n": len(durations),
+        "per_second": len(durations) / wall_time if wall_time else 0.0,
+        "p50_ms": percentile(durations, 0.50) * 1000,
+        "p95_ms": percentile(durations, 0.95) * 1000,
+        "p99_ms": percentile(durations, 0.99) * 1000,
+        "rss_mb": rss_mb(),
+    }
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def run_job(kind, label, fn, *args):
+    job = Job(f"bench-{kind}", kind, label)
+    job.run(fn, *args)
+    if job.status == FAILED:
+        raise job.error
+    return job.result
+
+
+def make_assistant(server_url, index_dir):
+    """An Assistant wired like app.py's, talking to ``server_url`` through the shared HTTP pool."""
+    from llama_index.embeddings.openai import OpenAIEmbedding
+    from llama_index.llms.openai import OpenAI
+
+    from client_pool import make_http_client
+    http_client, _ = make_http_client(config.HTTP_MAX_IN_FLIGHT, config.HTTP_TIMEOUT)
+    llm = OpenAI(api_key="bench", model=config.LLM_MODEL, temperature=config.LLM_TEMPERATURE,
+                 max_tokens=config.LLM_MAX_TOKENS, max_retries=0, api_base=server_url, http_client=http_client)
+    embed_model = OpenAIEmbedding(api_key="bench", model=config.EMBED_MODEL, api_base=server_url,
+                                  http_client=http_client)
+    policy = RequestPolicy(config.LLM_RETRIES, config.LLM_BACKOFF, config.LLM_BACKOFF_MAX, config.LLM_DEADLINE,
+                           config.LLM_HEDGE, config.LLM_HEDGE_DELAY, config.LLM_HEDGE_MIN_SAMPLES,
+                           CircuitBreaker(config.BREAKER_FAILURES, config.BREAKER_RESET),
+                           first_token_deadline=config.LLM_FIRST_TOKEN_DEADLINE)
+    # No response cache: every query should reach the model
+    return Assistant(llm, embed_model, UsageLog(), None, EmbeddingStore(index_dir, config.EMBED_MODEL),
+                     request_policy=policy)
+
+
+def bench_pack(files, server_url, args):
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="teach-assist-bench-") as root:
+        course_dir = os.path.join(root, "course")
+        os.makedirs(course_dir)
+        write_pack(course_dir, files)
+        assistant = make_assistant(server_url, os.path.join(root, "index"))
+
+        cache = CorpusCache()
+        corpus, cold = timed(cache.load, course_dir)
+        rows.append(row(files, "corpus.load cold", [cold]))
+        rows.append(row(files, "corpus.load warm", [timed(cache.load, course_dir)[1] for _ in range(20)]))
+
+        if assistant.use_retrieval(corpus):
+            rows.append(row(files, "retrieval.index", [timed(assistant.course_index, corpus)[1]]))
+
+        modules = [section.title for section in list(corpus.outline.modules.values())[:2]]
+        queries = (pack_prompts(modules) + GENERAL_QUERIES) * args.queries
+        queries = queries[:args.queries]
+        rows.append(row(files, "prompt.assemble", [
+            timed(assistant.prepare_chat, corpus, query, [], ConversationMemory(
+                config.HISTORY_TOKEN_BUDGET, config.HISTORY_SUMMARY_TOKENS))[1]
+            for query in queries
+        ]))
+
+        def answer(query):
+            memory = ConversationMemory(config.HISTORY_TOKEN_BUDGET, config.HISTORY_SUMMARY_TOKENS)
+            return run_job("chat", query, assistant.answer, corpus, query, [], memory)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            answers = list(pool.map(answer, queries))
+        wall_time = time.perf_counter() - start
+        rows.append(row(files, "chat.answer", [a.total_time for a in answers], wall_time))
+        first_tokens = [a.time_to_first_token for a in answers if a.time_to_first_token is not None]
+        if first_tokens:
+            rows.append(row(files, "chat.first_token", first_tokens, wall_time))
+
+        output_dir = os.path.join(root, "generated")
+        os.makedirs(output_dir)
+        rows.append(row(files, "course.generate", [
+            timed(run_job, "generate", "course files", assistant.generate_course_files,
+                  COURSE_DESCRIPTION, output_dir)[1]
+            for _ in range(args.generate_runs)
+        ]))
+
+        from pdf_export import create_session_pdf
+        sections = [(a.query, a.content) for a in answers]
+        flowable_cache = FlowableCache()
+        rows.append(row(files, "pdf.session cold", [timed(create_session_pdf, sections, "Bench", flowable_cache)[1]]))
+        rows.append(row(files, "pdf.session warm", [timed(create_session_pdf, sections, "Bench", flowable_cache)[1]]))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--queries", type=int, default=24)
+    parser.add_argument("--concurrency", type=int, default=config.PACK_CONCURRENCY)
+    parser.add_argument("--generate-runs", type=int, default=3)
+    parser.add_argument("--json", help="also write the report to this file")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    rows = []
+    with server_from_arguments(args) as server:
+        print(f"{'files':>6} {'stage':<18} {'n':>4} {'per s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+              f"{'rss MB':>8}")
+        for files in args.files:
+            for r in bench_pack(files, server.url, args):
+                rows.append(r)
+                print(f"{r['files']:>6} {r['stage']:<18} {r['n']:>4} {r['per_second']:>9.2f} {r['p50_ms']:>9.1f} "
+                      f"{r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['rss_mb']:>8.1f}")
+        print(f"\nfake server requests: {server.counts}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
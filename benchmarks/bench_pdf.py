@@ -0,0 +1,75 @@
+"""Benchmark the Markdown-to-PDF converter on synthetic lesson plans.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_pdf [--pages 25 50 100 200]
+
+Each "page" is a block of headings, paragraphs, lists, a table and a code
+sample of roughly one printed page. Per-page times should stay flat as the
+document grows if conversion scales linearly.
+"""
+import argparse
+import time
+
+from pdf_export import create_pdf_from_content, markdown_to_flowables, tokenize_markdown
+
+PAGE = """## Module {n}: Retrieval Augmented Generation, part {n}
+
+**Duration:** 2 hours. This session covers *chunking*, `embedding` models and
+how to evaluate retrieval quality for the <course> project & its labs.
+
+### Learning Objectives
+- Explain why chunk size affects recall
+  - Compare fixed-size and **semantic** chunking
+- Build a retriever with `top_k` tuning
+- Evaluate answers against a [reference set](https://example.com/eval?id={n}&v=2)
+
+### Activities
+1. Warm-up quiz (10 minutes)
+2. Pair programming lab
+3. Group discussion of failure cases
+
+| Activity | Duration | Materials |
+|----------|----------|-----------|
+| Quiz | 10 min | Slides |
+| Lab | 60 min | Notebook |
+| Review | 20 min | Whiteboard |
+
+```python
+def retrieve(query, k={n}):
+    return index.search(embed(query), k)
+```
+
+> Tip: keep the lab notebooks pinned so students can revisit them.
+
+---
+"""
+
+
+def synthetic_document(pages):
+    return "\n".join(PAGE.format(n=n) for n in range(1, pages + 1))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[25, 50, 100, 200])
+    args = parser.parse_args()
+
+    print(f"{'pages':>6} {'chars':>9} {'tokenize ms':>12} {'flowables ms':>13} {'pdf ms':>9} {'ms/page':>8}")
+    for pages in args.pages:
+        content = synthetic_document(pages)
+        _, tokenize_time = timed(tokenize_markdown, content)
+        _, flowables_time = timed(markdown_to_flowables, content)
+        buffer, pdf_time = timed(create_pdf_from_content, content, "Benchmark")
+        print(f"{pages:>6} {len(content):>9} {tokenize_time * 1000:>12.1f} {flowables_time * 1000:>13.1f} "
+              f"{pdf_time * 1000:>9.1f} {pdf_time * 1000 / pages:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Measure cold import times of the app's modules and its heavy dependencies.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_startup [--repeat 3]
+
+Each module is imported in a fresh interpreter, so the times include
+everything it pulls in. The modules app.py imports at the top should stay
+cheap; LlamaIndex, ReportLab and httpx are only meant to load on first use.
+"""
+import argparse
+import subprocess
+import sys
+
+# Imported by app.py before the first paint
+STARTUP_MODULES = [
+    "config", "assistant", "corpus", "embedding_store", "jobs", "memory",
+    "response_cache", "pdf_cache", "tokens", "uploads", "workspaces", "metrics", "resilience",
+]
+# Loaded lazily by the modules above
+DEFERRED_MODULES = [
+    "client_pool", "pdf_export", "llama_index.core", "llama_index.llms.openai", "llama_index.embeddings.openai",
+]
+
+_SNIPPET = "import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+
+
+def cold_import_time(module):
+    result = subprocess.run([sys.executable, "-c", _SNIPPET.format(module=module)],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'module':<32} {'phase':<9} {'best ms':>9}")
+    for phase, modules in (("startup", STARTUP_MODULES), ("deferred", DEFERRED_MODULES)):
+        for module in modules:
+            times = [t for t in (cold_import_time(module) for _ in range(args.repeat)) if t is not None]
+            best = f"{min(times) * 1000:.1f}" if times else "n/a"
+            print(f"{module:<32} {phase:<9} {best:>9}")
+    # Modules share dependencies, so the total is measured in one interpreter
+    times = [t for t in (cold_import_time(", ".join(STARTUP_MODULES)) for _ in range(args.repeat)) if t is not None]
+    print(f"\nall startup modules: {min(times) * 1000:.1f} ms" if times else "\nall startup modules: n/a")
+
+
+if __name__ == "__main__":
+    main()
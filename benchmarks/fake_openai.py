@@ -0,0 +1,261 @@
+"""A local stand-in for the OpenAI API, for benchmarks and load tests.
+
+Serves ``/v1/chat/completions`` (streamed or not), ``/v1/embeddings`` and
+``/v1/models`` with a configurable time to first token, token throughput
+and rate-limit error rate, so the app's paths can be timed without network
+calls or API spend. Point the app at it with
+``TEACH_ASSIST_API_BASE=http://127.0.0.1:8700/v1``.
+
+Run from the repository root:
+
+    python -m benchmarks.fake_openai [--port 8700] [--latency 0.3] [--tokens-per-second 400]
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+_WORDS = ("students", "module", "activity", "learning", "objective", "quiz", "discussion", "lab", "review",
+          "practice", "example", "concept", "assessment", "feedback", "project", "lesson")
+# OpenAI only caches prompt prefixes of at least 1024 tokens, in 128-token steps
+_CACHE_MIN_TOKENS = 1024
+_CACHE_STEP_TOKENS = 128
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def filler_tokens(count, seed):
+    rng = random.Random(seed)
+    return [rng.choice(_WORDS) + " " for _ in range(count)]
+
+
+class FakeOpenAIServer:
+    """Threaded HTTP server answering like the OpenAI API after simulated delays.
+
+    ``latency`` is the time to the first token, ``tokens_per_second`` the
+    generation rate after it; every reply has ``completion_tokens`` tokens
+    (capped by the request's ``max_tokens``). A fraction ``error_rate`` of
+    requests gets a 429 with a ``Retry-After`` header. A system prompt seen
+    before is reported as cached prompt tokens, like provider prompt caching.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.3, tokens_per_second=400.0, completion_tokens=300,
+                 embed_latency=0.05, embed_dim=256, error_rate=0.0, retry_after=1.0, chunk_tokens=4):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.embed_latency = embed_latency
+        self.embed_dim = embed_dim
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.chunk_tokens = chunk_tokens
+        self.counts = {"chat": 0, "embeddings": 0, "rate_limited": 0}
+        self._seen_prefixes = set()
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def _rate_limited(self):
+        if self.error_rate and random.random() < self.error_rate:
+            self._count("rate_limited")
+            return True
+        return False
+
+    def _cached_tokens(self, messages):
+        system = "".join(m.get("content") or "" for m in messages if m.get("role") == "system")
+        tokens = estimate_tokens(system)
+        if tokens < _CACHE_MIN_TOKENS:
+            return 0
+        digest = hashlib.sha256(system.encode("utf-8")).digest()
+        with self._lock:
+            seen = digest in self._seen_prefixes
+            self._seen_prefixes.add(digest)
+        return tokens - tokens % _CACHE_STEP_TOKENS if seen else 0
+
+    def _embedding(self, text):
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        return np.random.default_rng(seed).standard_normal(self.embed_dim).astype(np.float32).tolist()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "fake", "object": "model", "owned_by": "bench"}]})
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        fake = self.server.fake
+        if self.path.endswith("/chat/completions"):
+            fake._count("chat")
+            handler = self._chat
+        elif self.path.endswith("/embeddings"):
+            fake._count("embeddings")
+            handler = self._embeddings
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+            return
+        if fake._rate_limited():
+            self._send_json(429, {"error": {"message": "Rate limit reached (simulated)", "type": "rate_limit_error",
+                                            "code": "rate_limit_exceeded"}},
+                            {"Retry-After": f"{fake.retry_after:g}"})
+            return
+        handler(fake, body)
+
+    def _chat(self, fake, body):
+        messages = body.get("messages", [])
+        prompt_tokens = sum(estimate_tokens(m.get("content") or "") + 4 for m in messages)
+        completion_tokens = min(fake.completion_tokens, body.get("max_tokens") or fake.completion_tokens)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": fake._cached_tokens(messages)},
+        }
+        tokens = filler_tokens(completion_tokens, json.dumps(messages[-1:] if messages else []))
+        model = body.get("model", "fake")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        time.sleep(fake.latency)
+
+        if not body.get("stream"):
+            time.sleep(completion_tokens / fake.tokens_per_second)
+            self._send_json(200, {
+                "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)},
+                             "finish_reason": "stop"}],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(choices, **extra):
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": choices, **extra}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        def delta(content=None, finish_reason=None):
+            message = {} if content is None else {"content": content}
+            return [{"index": 0, "delta": message, "finish_reason": finish_reason}]
+
+        try:
+            event([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])
+            for start in range(0, len(tokens), fake.chunk_tokens):
+                piece = tokens[start:start + fake.chunk_tokens]
+                event(delta("".join(piece)))
+                time.sleep(len(piece) / fake.tokens_per_second)
+            event(delta(finish_reason="stop"))
+            if (body.get("stream_options") or {}).get("include_usage"):
+                # As with OpenAI, usage arrives in a final chunk without choices
+                event([], usage=usage)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading, e.g. a cancelled chat job
+            pass
+
+    def _embeddings(self, fake, body):
+        inputs = body.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        time.sleep(fake.embed_latency)
+        self._send_json(200, {
+            "object": "list",
+            "data": [{"object": "embedding", "index": i, "embedding": fake._embedding(str(text))}
+                     for i, text in enumerate(inputs)],
+            "model": body.get("model", "fake"),
+            "usage": {"prompt_tokens": sum(estimate_tokens(str(text)) for text in inputs),
+                      "total_tokens": sum(estimate_tokens(str(text)) for text in inputs)},
+        })
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def add_server_arguments(parser):
+    """The stand-in server's knobs, shared by the scripts that start one."""
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds to the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=400.0)
+    parser.add_argument("--completion-tokens", type=int, default=300)
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with a 429")
+
+
+def server_from_arguments(args, port=0):
+    return FakeOpenAIServer(port=port, latency=args.latency, tokens_per_second=args.tokens_per_second,
+                            completion_tokens=args.completion_tokens, embed_latency=args.embed_latency,
+                            error_rate=args.error_rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8700)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = server_from_arguments(args, args.port)
+    print(f"Serving a fake OpenAI API on {server.url} (Ctrl+C to stop)")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""Drive many simulated instructor sessions through app.py concurrently to find where the host saturates.
+
+Run from the repository root:
+
+    python -m benchmarks.load_test [--sessions 1 2 4 8 16 32] [--rounds 2] [--files 10]
+
+Each session is a ``streamlit.testing.v1.AppTest`` running the real app
+script in its own process. AppTest cannot run sessions concurrently in one
+process: every run installs and then clears the process-global Streamlit
+runtime, so another session's ``st.download_button`` fails with "Runtime
+hasn't been created!" whenever a run ends. Sessions therefore do not share
+``st.cache_resource`` caches, job queues or the HTTP pool as browser sessions
+of one server do, and the saturation point is the capacity of the host
+(its CPUs and the model endpoint), not of one Streamlit process.
+
+Each process first opens the app once on an empty course to load the app
+stack, then all sessions start together. That warm-up's memory is reported
+as the fixed cost of a process; per-session memory is what the process grew
+by after it, i.e. the session's own state and caches. A session uploads a
+course pack, then for each round clicks a Quick Action, sends a free-text
+chat message and downloads the answer as a PDF, and finally exports the
+session PDF. Model calls go to ``benchmarks.fake_openai``.
+
+AppTest cannot drive ``st.file_uploader``, so the upload step calls the
+app's ``save_uploads`` directly with the pack's files, the same way the
+uploader's files are saved.
+
+For each concurrency level the report gives step throughput and latency as
+an instructor sees it (including waiting for answers), the script time of
+each rerun, errors the app showed (exceptions and error bubbles), the fixed
+memory of a process and the memory each session added on top of it. The
+host's saturation point is the first level where throughput stops growing or
+rerun p95 exceeds ``--rerun-budget-ms``, i.e. where reruns start queueing.
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+import uuid
+
+import config
+from benchmarks.bench_offline import rss_mb, write_pack
+from benchmarks.fake_openai import add_server_arguments, server_from_arguments
+from metrics import REGISTRY, percentile
+from uploads import save_uploads
+from workspaces import open_workspace
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+STEPS = ["upload", "open", "quick_action", "chat", "pdf", "export"]
+CHAT_QUERIES = [
+    "How should I assess group projects fairly?",
+    "Suggest a warm-up activity for module 2",
+    "Write three discussion questions about trade-offs between approaches",
+]
+
+
+class _Upload(io.BytesIO):
+    """Stands in for Streamlit's UploadedFile: a byte stream with a name and size."""
+
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+        self.file_id = f"{name}-{uuid.uuid4().hex[:8]}"
+
+
+class SessionStats:
+    def __init__(self):
+        self.steps = {step: [] for step in STEPS}
+        self.errors = 0
+
+    def add(self, step, seconds, error=False):
+        self.steps[step].append(seconds)
+        self.errors += error
+
+
+def find_button(at, key=None, label_prefix=None):
+    for button in at.button:
+        if (key is not None and button.key == key) or (label_prefix and button.label.startswith(label_prefix)):
+            return button
+    return None
+
+
+def failed(at):
+    history = at.session_state["chat_history"] if "chat_history" in at.session_state else []
+    return bool(at.exception) or bool(history and history[-1][1].startswith("❌"))
+
+
+def timed_run(stats, step, at):
+    start = time.perf_counter()
+    at.run()
+    stats.add(step, time.perf_counter() - start, failed(at))
+
+
+def run_session(number, pack, args, settings, start_together):
+    """One instructor's visit, run in a worker process; returns its step timings, reruns, errors and memory."""
+    rss_start = rss_mb()
+    from streamlit.testing.v1 import AppTest
+
+    # Spawned workers start from a fresh config module; the app reads these at call time
+    os.environ.setdefault("OPENAI_API_KEY", "load-test")
+    for name, value in settings.items():
+        setattr(config, name, value)
+    # One embedding store per process: the on-disk store is not safe to share between processes
+    config.INDEX_DIR = os.path.join(settings["CACHE_DIR"], f"index-{os.getpid()}")
+
+    # Warm-up on an empty course: imports, clients and caches a server process loads once
+    warm_up = AppTest.from_file(APP_PATH, default_timeout=args.timeout)
+    warm_up.query_params["course"] = uuid.uuid4().hex
+    warm_up.run()
+    REGISTRY.reset()
+    rss_before = rss_mb()
+    start_together.wait()
+    started = time.time()
+
+    stats = SessionStats()
+    workspace_id = uuid.uuid4().hex
+    files = dict(pack)
+    if not args.shared_pack:
+        # A different course per instructor, so each session parses and indexes its own pack
+        files["curriculum.md"] = files["curriculum.md"] + f"\n\nCohort: {workspace_id}\n".encode()
+    start = time.perf_counter()
+    save_uploads([_Upload(name, data) for name, data in files.items()],
+                 open_workspace(config.WORKSPACE_ROOT, workspace_id),
+                 config.UPLOAD_MAX_FILE_MB << 20, config.UPLOAD_MAX_TOTAL_MB << 20, config.UPLOAD_CHUNK_BYTES)
+    stats.add("upload", time.perf_counter() - start)
+
+    at = AppTest.from_file(APP_PATH, default_timeout=args.timeout)
+    at.query_params["course"] = workspace_id
+    timed_run(stats, "open", at)
+
+    for round_number in range(args.rounds):
+        action = find_button(at, key=("btn_lesson", "btn_quiz", "btn_activities", "btn_assignment")[round_number % 4])
+        if action is not None:
+            action.click()
+            timed_run(stats, "quick_action", at)
+
+        query = CHAT_QUERIES[(number + round_number) % len(CHAT_QUERIES)]
+        if at.text_input:
+            at.text_input[0].input(f"{query} (session {number}, round {round_number})")
+            send = find_button(at, label_prefix="Send")
+            if send is not None:
+                send.click()
+                timed_run(stats, "chat", at)
+
+        prepare = find_button(at, key="prepare_pdf")
+        if prepare is not None:
+            prepare.click()
+            timed_run(stats, "pdf", at)
+
+    export = find_button(at, label_prefix="📚 Export Session")
+    if export is not None and not export.disabled:
+        export.click()
+        timed_run(stats, "export", at)
+    return {"steps": stats.steps, "errors": stats.errors, "reruns": REGISTRY.samples("rerun"),
+            "process_mb": rss_before - rss_start, "rss_mb": rss_mb() - rss_before,
+            "started": started, "finished": time.time()}
+
+
+def run_level(sessions, pack, args, settings):
+    # A fresh process per session; spawn so no parent state leaks into the workers
+    context = multiprocessing.get_context("spawn")
+    with context.Manager() as manager, context.Pool(sessions, maxtasksperchild=1) as pool:
+        # Sessions start together once every process has warmed up
+        start_together = manager.Barrier(sessions)
+        results = pool.starmap(run_session, [(number, pack, args, settings, start_together)
+                                             for number in range(sessions)])
+    wall_time = max(result["finished"] for result in results) - min(result["started"] for result in results)
+
+    step_times = {step: [d for result in results for d in result["steps"][step]] for step in STEPS}
+    steps = sum(len(durations) for durations in step_times.values())
+    interactions = sorted(d for step, durations in step_times.items() if step != "upload" for d in durations)
+    reruns = sorted(d for result in results for d in result["reruns"])
+    return {
+        "sessions": sessions,
+        "steps_per_second": steps / wall_time,
+        "step_p50_ms": percentile(interactions, 0.50) * 1000,
+        "step_p95_ms": percentile(interactions, 0.95) * 1000,
+        "rerun_count": len(reruns),
+        "rerun_p50_ms": percentile(reruns, 0.50) * 1000,
+        "rerun_p95_ms": percentile(reruns, 0.95) * 1000,
+        "rerun_p99_ms": percentile(reruns, 0.99) * 1000,
+        "errors": sum(result["errors"] for result in results),
+        "process_mb": sum(result["process_mb"] for result in results) / sessions,
+        "rss_mb_per_session": sum(result["rss_mb"] for result in results) / sessions,
+        "steps": {step: {"n": len(d), "p50_ms": percentile(sorted(d), 0.50) * 1000,
+                         "p95_ms": percentile(sorted(d), 0.95) * 1000}
+                  for step, d in step_times.items() if d},
+    }
+
+
+def saturation_point(levels, rerun_budget_ms):
+    """First level where throughput grows by less than 10% or rerun p95 is over budget (host capacity)."""
+    for previous, level in zip([None] + levels, levels):
+        if level["rerun_p95_ms"] > rerun_budget_ms:
+            return level["sessions"]
+        if previous is not None and level["steps_per_second"] < previous["steps_per_second"] * 1.1:
+            return level["sessions"]
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--rounds", type=int, default=2, help="Quick Action, chat and PDF rounds per session")
+    parser.add_argument("--files", type=int, default=10, help="files in each session's course pack")
+    parser.add_argument("--shared-pack", action="store_true", help="every session uploads the same course")
+    parser.add_argument("--rerun-budget-ms", type=float, default=500.0)
+    parser.add_argument("--timeout", type=float, default=300.0, help="seconds one interaction may take")
+    parser.add_argument("--response-cache", action="store_true", help="keep the response cache on")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="teach-assist-load-") as root, server_from_arguments(args) as server:
+        # Applied to config in every session's process
+        settings = {
+            "API_BASE": server.url,
+            "WORKSPACE_ROOT": os.path.join(root, "workspaces"),
+            "CACHE_DIR": os.path.join(root, "cache"),
+            "RESPONSE_CACHE_ENABLED": args.response_cache,
+        }
+
+        pack_dir = os.path.join(root, "pack")
+        os.makedirs(pack_dir)
+        write_pack(pack_dir, args.files)
+        pack = {}
+        for name in sorted(os.listdir(pack_dir)):
+            with open(os.path.join(pack_dir, name), "rb") as f:
+                pack[name] = f.read()
+
+        levels = []
+        print(f"{'sessions':>8} {'steps/s':>8} {'step p50':>9} {'step p95':>9} {'reruns':>7} {'rerun p50':>10} "
+              f"{'rerun p95':>10} {'rerun p99':>10} {'errors':>7} {'MB/process':>11} {'MB/session':>11}")
+        for sessions in args.sessions:
+            level = run_level(sessions, pack, args, settings)
+            levels.append(level)
+            print(f"{level['sessions']:>8} {level['steps_per_second']:>8.2f} {level['step_p50_ms']:>9.0f} "
+                  f"{level['step_p95_ms']:>9.0f} {level['rerun_count']:>7} {level['rerun_p50_ms']:>10.1f} "
+                  f"{level['rerun_p95_ms']:>10.1f} {level['rerun_p99_ms']:>10.1f} {level['errors']:>7} "
+                  f"{level['process_mb']:>11.1f} {level['rss_mb_per_session']:>11.1f}")
+
+        print("\nper step at the highest level (ms):")
+        for step, stats in levels[-1]["steps"].items():
+            print(f"  {step:<13} n={stats['n']:<4} p50 {stats['p50_ms']:>8.0f}  p95 {stats['p95_ms']:>8.0f}")
+        print("MB/process is the fixed cost of the app stack in each session's process; a server pays it once")
+        saturated = saturation_point(levels, args.rerun_budget_ms)
+        if saturated is None:
+            print(f"\nhost capacity: no saturation up to {levels[-1]['sessions']} concurrent sessions")
+        else:
+            print(f"\nhost capacity: saturation at about {saturated} concurrent sessions, one process each")
+        print(f"fake server requests: {server.counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""One keep-alive HTTP connection pool shared by every LLM and embedding client in the process."""
+import threading
+import time
+import weakref
+
+import httpx
+
+from resilience import SlotWatch
+
+# How often a queued request checks whether its caller gave up on it
+_ABANDON_CHECK = 0.25
+
+
+class PoolStats:
+    """Thread-safe counters for requests passing through a ``BoundedTransport``."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.waiting = 0
+        self.peak_in_flight = 0
+        self.total_wait = 0.0
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "peak_in_flight": self.peak_in_flight,
+                "mean_wait": self.total_wait / self.requests if self.requests else 0.0,
+            }
+
+    def add(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+
+class _Slot:
+    """One acquired in-flight slot, released at most once."""
+
+    def __init__(self, release):
+        self._release = release
+        self._lock = threading.Lock()
+
+    def release(self):
+        with self._lock:
+            release, self._release = self._release, None
+        if release is not None:
+            release()
+
+
+def _close_and_release(stream, slot):
+    try:
+        stream.close()
+    finally:
+        slot.release()
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    # A request holds its slot until the response body is closed, which for
+    # streamed completions is after the last chunk. A body that is dropped
+    # unclosed (e.g. a cancelled stream) gives the slot back when collected.
+    def __init__(self, stream, slot):
+        self._stream = stream
+        self._finalizer = weakref.finalize(self, _close_and_release, stream, slot)
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self):
+        self._finalizer()
+
+
+class BoundedTransport(httpx.HTTPTransport):
+    """HTTP transport allowing at most ``max_in_flight`` requests at once across all its users.
+
+    A request waits for a slot at most its pool timeout (``pool_timeout``
+    when the request sets none), then fails with ``httpx.PoolTimeout``; so
+    does a request whose ``SlotWatch`` is abandoned while it waits.
+    """
+
+    def __init__(self, max_in_flight, stats, pool_timeout=60.0, **kwargs):
+        super().__init__(**kwargs)
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self.pool_timeout = pool_timeout
+        self.stats = stats
+
+    def handle_request(self, request):
+        timeout = request.extensions.get("timeout", {}).get("pool") or self.pool_timeout
+        watch = SlotWatch.current()
+        self.stats.add(waiting=1)
+        start = time.perf_counter()
+        if watch is not None:
+            watch.queued = True
+        if not self._acquire(timeout, watch):
+            self.stats.add(waiting=-1, errors=1)
+            if watch is not None and watch.abandoned.is_set():
+                raise httpx.PoolTimeout("Request abandoned while waiting for a connection slot", request=request)
+            raise httpx.PoolTimeout(f"No free connection slot within {timeout:g}s", request=request)
+        self.stats.add(waiting=-1, in_flight=1, requests=1, total_wait=time.perf_counter() - start)
+        if watch is not None:
+            watch.acquired_at = time.monotonic()
+        slot = _Slot(self._release)
+        try:
+            response = super().handle_request(request)
+        except Exception:
+            slot.release()
+            self.stats.add(errors=1)
+            raise
+        if response.status_code >= 400:
+            self.stats.add(errors=1)
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, slot),
+            extensions=response.extensions,
+        )
+
+    def _acquire(self, timeout, watch):
+        if watch is None:
+            return self._slots.acquire(timeout=timeout)
+        end = time.monotonic() + timeout
+        while not watch.abandoned.is_set():
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                return False
+            if self._slots.acquire(timeout=min(_ABANDON_CHECK, remaining)):
+                return True
+        return False
+
+    def _release(self):
+        self.stats.add(in_flight=-1)
+        self._slots.release()
+
+
+def make_http_client(max_in_flight, timeout):
+    """An ``httpx.Client`` whose connections are kept alive and reused between requests."""
+    stats = PoolStats()
+    transport = BoundedTransport(
+        max_in_flight, stats, pool_timeout=timeout,
+        limits=httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight),
+        retries=1,
+    )
+    return httpx.Client(transport=transport, timeout=timeout), stats
@@ -0,0 +1,124 @@
+"""Runtime settings for Teach Assist, overridable through environment variables."""
+import os
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name, default):
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    return value.strip().lower() in ("1", "true", "yes", "on") if value else default
+
+
+# LLM
+LLM_MODEL = os.getenv("TEACH_ASSIST_MODEL", "gpt-3.5-turbo")
+LLM_TEMPERATURE = _env_float("TEACH_ASSIST_TEMPERATURE", 0.1)
+LLM_MAX_TOKENS = _env_int("TEACH_ASSIST_MAX_TOKENS", 1000)
+EMBED_MODEL = os.getenv("TEACH_ASSIST_EMBED_MODEL", "text-embedding-3-small")
+# Base URL of an OpenAI-compatible API, e.g. the stand-in server in benchmarks/fake_openai.py
+API_BASE = os.getenv("TEACH_ASSIST_API_BASE") or None
+STREAM_RESPONSES = _env_bool("TEACH_ASSIST_STREAM", True)
+# Ask for token usage at the end of streamed responses (OpenAI's stream_options.include_usage)
+STREAM_USAGE = _env_bool("TEACH_ASSIST_STREAM_USAGE", True)
+
+# HTTP: requests in flight at once across all sessions (and the size of the
+# shared keep-alive connection pool), and the per-request timeout in seconds
+HTTP_MAX_IN_FLIGHT = _env_int("TEACH_ASSIST_HTTP_MAX_IN_FLIGHT", 16)
+HTTP_TIMEOUT = _env_float("TEACH_ASSIST_HTTP_TIMEOUT", 60.0)
+
+# Retrieval: "auto" stuffs small corpora whole and retrieves for large ones,
+# "always" retrieves for every query, "off" always stuffs the whole corpus.
+RETRIEVAL_MODE = os.getenv("TEACH_ASSIST_RETRIEVAL", "auto")
+RETRIEVAL_TOP_K = _env_int("TEACH_ASSIST_TOP_K", 8)
+RETRIEVAL_TOKEN_BUDGET = _env_int("TEACH_ASSIST_CONTEXT_TOKENS", 2000)
+FULL_CONTEXT_MAX_TOKENS = _env_int("TEACH_ASSIST_FULL_CONTEXT_TOKENS", 2500)
+CHUNK_TOKENS = _env_int("TEACH_ASSIST_CHUNK_TOKENS", 300)
+# Embedding store: chunk vectors kept on disk across courses and restarts, and
+# seconds an unused chunk is kept once the store is over that size
+EMBED_STORE_MAX_CHUNKS = _env_int("TEACH_ASSIST_EMBED_STORE_CHUNKS", 50000)
+EMBED_STORE_TTL = _env_int("TEACH_ASSIST_EMBED_STORE_TTL", 30 * 24 * 3600)
+
+# Module targeting: queries naming a curriculum module get only that module's
+# section plus up to MODULE_GUIDANCE_TOKENS of matching pedagogy sections
+MODULE_CONTEXT = _env_bool("TEACH_ASSIST_MODULE_CONTEXT", True)
+MODULE_GUIDANCE_TOKENS = _env_int("TEACH_ASSIST_MODULE_GUIDANCE_TOKENS", 600)
+
+# Conversation memory: total tokens of replayed history, of which the
+# running summary of older turns may use at most HISTORY_SUMMARY_TOKENS
+HISTORY_TOKEN_BUDGET = _env_int("TEACH_ASSIST_HISTORY_TOKENS", 2000)
+HISTORY_SUMMARY_TOKENS = _env_int("TEACH_ASSIST_HISTORY_SUMMARY_TOKENS", 300)
+
+# Background jobs: worker threads shared by all sessions, and how often a
+# session with pending jobs reruns to pick up their results
+JOB_WORKERS = _env_int("TEACH_ASSIST_JOB_WORKERS", 8)
+JOB_POLL_INTERVAL = _env_float("TEACH_ASSIST_JOB_POLL_INTERVAL", 0.5)
+# Seconds a finished job (and its result, e.g. a session PDF) waits to be collected before it is dropped
+JOB_RESULT_TTL = _env_int("TEACH_ASSIST_JOB_RESULT_TTL", 900)
+
+# "Generate all" Quick Actions: requests in flight at once
+PACK_CONCURRENCY = _env_int("TEACH_ASSIST_PACK_CONCURRENCY", 4)
+
+# LLM request policy: retries of 429s, 5xx and timeouts with full-jitter
+# exponential backoff (from LLM_BACKOFF up to LLM_BACKOFF_MAX seconds, never
+# shorter than Retry-After), and a deadline in seconds per request across its
+# attempts (0: none). LLM_HEDGE sends a duplicate of a call still running after
+# the p95 latency of its kind (LLM_HEDGE_DELAY seconds until LLM_HEDGE_MIN_SAMPLES
+# calls are timed). A streamed answer that sends nothing for
+# LLM_FIRST_TOKEN_DEADLINE seconds (0: no limit) is retried. After
+# BREAKER_FAILURES consecutive failed requests (0: never) calls fail fast for
+# BREAKER_RESET seconds.
+LLM_RETRIES = _env_int("TEACH_ASSIST_LLM_RETRIES", 4)
+LLM_BACKOFF = _env_float("TEACH_ASSIST_LLM_BACKOFF", 1.0)
+LLM_BACKOFF_MAX = _env_float("TEACH_ASSIST_LLM_BACKOFF_MAX", 30.0)
+LLM_DEADLINE = _env_float("TEACH_ASSIST_LLM_DEADLINE", 120.0)
+LLM_HEDGE = _env_bool("TEACH_ASSIST_LLM_HEDGE", False)
+LLM_HEDGE_DELAY = _env_float("TEACH_ASSIST_LLM_HEDGE_DELAY", 10.0)
+LLM_HEDGE_MIN_SAMPLES = _env_int("TEACH_ASSIST_LLM_HEDGE_MIN_SAMPLES", 20)
+LLM_FIRST_TOKEN_DEADLINE = _env_float("TEACH_ASSIST_LLM_FIRST_TOKEN_DEADLINE", 30.0)
+BREAKER_FAILURES = _env_int("TEACH_ASSIST_BREAKER_FAILURES", 5)
+BREAKER_RESET = _env_float("TEACH_ASSIST_BREAKER_RESET", 30.0)
+
+# Workspaces: one directory of course files per course ID, removed after
+# WORKSPACE_TTL seconds without being opened (checked every
+# WORKSPACE_SWEEP_INTERVAL seconds), and how many courses' parsed files are
+# kept in memory
+WORKSPACE_ROOT = os.getenv("TEACH_ASSIST_WORKSPACE_ROOT", "workspaces")
+WORKSPACE_TTL = _env_int("TEACH_ASSIST_WORKSPACE_TTL", 30 * 24 * 3600)
+WORKSPACE_SWEEP_INTERVAL = _env_int("TEACH_ASSIST_WORKSPACE_SWEEP_INTERVAL", 3600)
+CORPUS_CACHE_COURSES = _env_int("TEACH_ASSIST_CORPUS_CACHE_COURSES", 32)
+
+# Uploads: per-file and per-upload size limits, and the block size files are copied in
+UPLOAD_MAX_FILE_MB = _env_int("TEACH_ASSIST_UPLOAD_MAX_FILE_MB", 10)
+UPLOAD_MAX_TOTAL_MB = _env_int("TEACH_ASSIST_UPLOAD_MAX_TOTAL_MB", 50)
+UPLOAD_CHUNK_BYTES = _env_int("TEACH_ASSIST_UPLOAD_CHUNK_BYTES", 1 << 20)
+
+# Static assets: ASSET_RELOAD re-reads changed files (for development);
+# INLINE_CSS sends the stylesheet with every rerun, for hosts without static serving
+ASSET_RELOAD = _env_bool("TEACH_ASSIST_ASSET_RELOAD", False)
+INLINE_CSS = _env_bool("TEACH_ASSIST_INLINE_CSS", False)
+
+# Instrumentation: level of the teach_assist.* loggers (INFO logs every timed
+# operation as a JSON line), latency samples kept per operation, and the token
+# the admin page asks for in its ?token= parameter (unset: the page is closed)
+LOG_LEVEL = os.getenv("TEACH_ASSIST_LOG_LEVEL", "INFO").upper()
+METRICS_SAMPLES = _env_int("TEACH_ASSIST_METRICS_SAMPLES", 1000)
+ADMIN_TOKEN = os.getenv("TEACH_ASSIST_ADMIN_TOKEN")
+
+# Chat panel: messages rendered per page of history
+CHAT_PAGE_SIZE = _env_int("TEACH_ASSIST_CHAT_PAGE_SIZE", 20)
+
+# Embedding store directory (vectors and chunk table)
+INDEX_DIR = os.getenv("TEACH_ASSIST_INDEX_DIR", "course_index")
+
+# Response cache
+CACHE_DIR = os.getenv("TEACH_ASSIST_CACHE_DIR", ".cache")
+RESPONSE_CACHE_ENABLED = _env_bool("TEACH_ASSIST_RESPONSE_CACHE", True)
+RESPONSE_CACHE_ENTRIES = _env_int("TEACH_ASSIST_RESPONSE_CACHE_ENTRIES", 256)
+RESPONSE_CACHE_TTL = _env_int("TEACH_ASSIST_RESPONSE_CACHE_TTL", 7 * 24 * 3600)
@@ -0,0 +1,150 @@
+"""Course corpus loading with a per-file parse cache keyed by file fingerprints."""
+import hashlib
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+from curriculum import CourseOutline
+from metrics import REGISTRY
+
+Corpus = namedtuple("Corpus", ["documents", "context", "fingerprint", "outline"])
+
+_FileEntry = namedtuple("_FileEntry", ["size", "mtime_ns", "sha256"])
+
+_HASH_CHUNK_SIZE = 1 << 16
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def list_course_files(directory):
+    """Files SimpleDirectoryReader picks up: top level only, hidden files skipped."""
+    paths = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if not name.startswith(".") and os.path.isfile(path):
+            paths.append(path)
+    return paths
+
+
+class CorpusCache:
+    """Keeps parsed course documents in memory between Streamlit reruns.
+
+    Every ``load`` stats the files in the directory; only files whose size or
+    mtime moved are re-hashed. Parsed documents are stored by file name and
+    content hash, and corpora by a fingerprint of those, so identical course
+    packs in different workspaces are parsed once and share one ``Corpus``
+    (and with it the section outline and retrieval index built for it).
+    At most ``max_corpora`` directories are kept, least recently loaded
+    dropped first.
+    """
+
+    def __init__(self, max_corpora=32):
+        self.max_corpora = max_corpora
+        # Guards the dicts only; hashing and parsing run outside it
+        self._lock = threading.Lock()
+        self._build_locks = {}
+        self._files = {}
+        self._documents = {}
+        self._packs = {}
+        self._corpora = OrderedDict()
+
+    def load(self, directory):
+        """Corpus for the files in ``directory``, parsing only files not seen before.
+
+        Hashing and parsing happen outside the cache lock, so a large upload
+        in one workspace does not hold up reruns in the others; concurrent
+        loads of the same pack wait for a single parse.
+        """
+        directory = os.path.abspath(directory)
+        keys = [(os.path.basename(path), self._file_hash(path)) for path in list_course_files(directory)]
+        fingerprint = _fingerprint(keys)
+        with self._lock:
+            present = {os.path.join(directory, name) for name, _ in keys}
+            for path in [p for p in self._files if os.path.dirname(p) == directory and p not in present]:
+                del self._files[path]
+            corpus = self._corpora.get(directory)
+            if corpus is not None and corpus.fingerprint == fingerprint:
+                self._corpora.move_to_end(directory)
+                return corpus
+            build_lock = self._build_locks.setdefault(fingerprint, threading.Lock())
+
+        with build_lock:
+            with self._lock:
+                pack = self._packs.get(fingerprint)
+                documents = {key: self._documents[key] for key in keys if key in self._documents}
+            if pack is None:
+                for key in keys:
+                    if key not in documents:
+                        documents[key] = _parse(os.path.join(directory, key[0]))
+                ordered = [doc for key in keys for doc in documents[key]]
+                context = "\n\n".join([doc.text for doc in ordered])
+                pack = (Corpus(ordered, context, fingerprint, CourseOutline(ordered)), keys)
+            with self._lock:
+                self._documents.update(documents)
+                self._packs.setdefault(fingerprint, pack)
+                self._build_locks.pop(fingerprint, None)
+                corpus = self._packs[fingerprint][0]
+                self._corpora[directory] = corpus
+                self._corpora.move_to_end(directory)
+                while len(self._corpora) > self.max_corpora:
+                    evicted, _ = self._corpora.popitem(last=False)
+                    self._forget_files(evicted)
+                self._prune()
+                return corpus
+
+    def invalidate(self, directory=None):
+        """Forget cached files, for one directory or everything."""
+        with self._lock:
+            if directory is None:
+                self._files.clear()
+                self._documents.clear()
+                self._packs.clear()
+                self._corpora.clear()
+                return
+            directory = os.path.abspath(directory)
+            self._corpora.pop(directory, None)
+            self._forget_files(directory)
+            self._prune()
+
+    def _file_hash(self, path):
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._files.get(path)
+        if entry is None or entry.size != stat.st_size or entry.mtime_ns != stat.st_mtime_ns:
+            entry = _FileEntry(stat.st_size, stat.st_mtime_ns, hash_file(path))
+            with self._lock:
+                self._files[path] = entry
+        return entry.sha256
+
+    def _forget_files(self, directory):
+        for path in [p for p in self._files if os.path.dirname(p) == directory]:
+            del self._files[path]
+
+    def _prune(self):
+        # Drop packs no directory is showing, then documents no remaining pack uses
+        showing = {corpus.fingerprint for corpus in self._corpora.values()}
+        for fingerprint in [f for f in self._packs if f not in showing]:
+            del self._packs[fingerprint]
+        used = {key for _, keys in self._packs.values() for key in keys}
+        for key in [k for k in self._documents if k not in used]:
+            del self._documents[key]
+
+
+def _parse(path):
+    # LlamaIndex loads on the first parse rather than at startup
+    from llama_index.core import SimpleDirectoryReader
+    with REGISTRY.timer("documents.parse", file=os.path.basename(path)):
+        return SimpleDirectoryReader(input_files=[path]).load_data()
+
+
+def _fingerprint(keys):
+    digest = hashlib.sha256()
+    for name, sha256 in keys:
+        digest.update(f"{name}\0{sha256}\n".encode("utf-8"))
+    return digest.hexdigest()
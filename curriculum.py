@@ -0,0 +1,135 @@
+"""Heading-based section trees for course Markdown, so prompts can target one module."""
+import re
+from collections import namedtuple
+
+from retrieval import estimate_tokens
+
+# ``text`` covers the heading line and everything up to the next heading at the same or a higher level
+Section = namedtuple("Section", ["title", "level", "text", "source", "children"])
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+# Modules written as bold or list lines instead of headings ("**Module 2: Loops**")
+_MODULE_LINE = re.compile(r"^\s*(?:[-*]\s+)?\*\*\s*(Module\s+\d+\b[^*]*)\*\*\s*$", re.IGNORECASE)
+_MODULE_TITLE = re.compile(r"^Module\s+(\d+)\b\s*[:.\-–]?\s*(.*)$", re.IGNORECASE)
+_MODULE_REFERENCE = re.compile(r"\bmodule\s+(\d+)\b", re.IGNORECASE)
+_WORD = re.compile(r"[a-z]{4,}")
+_PSEUDO_LEVEL = 7
+
+_STOPWORDS = frozenset(
+    "about create detailed each every from generate give help into make module more provide some students "
+    "suggest that their them there these this what when which with your".split()
+)
+
+
+def parse_sections(text, source=""):
+    """Return the top-level sections of Markdown ``text``, each with its subsections."""
+    lines = text.splitlines()
+    headings = []
+    in_fence = False
+    for number, line in enumerate(lines):
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            continue
+        match = _HEADING.match(line)
+        if match:
+            headings.append((number, len(match.group(1)), match.group(2).strip("* ")))
+            continue
+        match = _MODULE_LINE.match(line)
+        if match:
+            headings.append((number, _PSEUDO_LEVEL, match.group(1).strip()))
+
+    roots, stack = [], []
+    for i, (start, level, title) in enumerate(headings):
+        end = len(lines)
+        for later_start, later_level, _ in headings[i + 1:]:
+            if later_level <= level:
+                end = later_start
+                break
+        section = Section(title, level, "\n".join(lines[start:end]).strip(), source, [])
+        while stack and stack[-1].level >= level:
+            stack.pop()
+        (stack[-1].children if stack else roots).append(section)
+        stack.append(section)
+    return roots
+
+
+def walk(sections):
+    for section in sections:
+        yield section
+        yield from walk(section.children)
+
+
+def _words(text):
+    return [word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS]
+
+
+class CourseOutline:
+    """Section trees of the course documents, with the curriculum's modules indexed.
+
+    Documents that declare modules ("Module 1: ...") are treated as the
+    curriculum; the leaf sections of every other document are the teaching
+    guidance that can accompany a module.
+    """
+
+    def __init__(self, documents):
+        self.course_title = None
+        self.modules = {}
+        self.guidance = []
+        for doc in documents:
+            sections = parse_sections(doc.text, doc.metadata.get("file_name", ""))
+            modules = [s for s in walk(sections) if _MODULE_TITLE.match(s.title)]
+            if modules:
+                for section in modules:
+                    self.modules.setdefault(int(_MODULE_TITLE.match(section.title).group(1)), section)
+                if self.course_title is None:
+                    self.course_title = self._find_course_title(sections)
+            else:
+                self.guidance.extend(s for s in walk(sections) if not s.children)
+
+    @property
+    def module_titles(self):
+        return [self.modules[number].title for number in sorted(self.modules)]
+
+    def match_module(self, query):
+        """The module ``query`` refers to by number or by name, or None."""
+        match = _MODULE_REFERENCE.search(query)
+        if match and int(match.group(1)) in self.modules:
+            return self.modules[int(match.group(1))]
+        lowered = query.lower()
+        for number in sorted(self.modules):
+            name = _MODULE_TITLE.match(self.modules[number].title).group(2).strip().lower()
+            if len(name) >= 4 and name in lowered:
+                return self.modules[number]
+        return None
+
+    def module_context(self, module, query, guidance_tokens):
+        """The module's section plus the guidance sections that best match ``query``."""
+        parts = [f"Course: {self.course_title}"] if self.course_title else []
+        parts.append(module.text)
+        query_words = set(_words(query))
+        scored = []
+        for position, section in enumerate(self.guidance):
+            title_hits = len(query_words.intersection(_words(section.title)))
+            body_hits = sum(1 for word in _words(section.text) if word in query_words)
+            score = 3 * title_hits + min(body_hits, 5)
+            if score:
+                scored.append((-score, position, section))
+        used = 0
+        for _, _, section in sorted(scored):
+            tokens = estimate_tokens(section.text)
+            if used + tokens > guidance_tokens:
+                continue
+            parts.append(section.text)
+            used += tokens
+        return "\n\n".join(parts)
+
+    @staticmethod
+    def _find_course_title(sections):
+        for section in walk(sections):
+            if section.title.lower() == "course title":
+                body = section.text.split("\n", 1)[1].strip() if "\n" in section.text else ""
+                if body:
+                    return body.splitlines()[0].strip()
+        return sections[0].title if sections else None
@@ -0,0 +1,173 @@
+"""On-disk embedding store keyed by chunk content hash.
+
+Vectors live in a flat float32 file that is memory-mapped on load; a small
+SQLite table maps each chunk hash to its row and when it was last used.
+Chunks already embedded by an earlier run (or an earlier upload of the same
+course) are never re-embedded; compaction evicts the least recently used.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+_EMBED_BATCH_SIZE = 64
+
+
+class EmbeddingStore:
+    def __init__(self, directory, model_name):
+        os.makedirs(directory, exist_ok=True)
+        self.model_name = model_name
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, "chunks.sqlite"), check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "sha256 TEXT PRIMARY KEY, row INTEGER NOT NULL, source TEXT, chars INTEGER, used REAL DEFAULT 0)"
+        )
+        if "used" not in [column[1] for column in self._db.execute("PRAGMA table_info(chunks)")]:
+            # Stores written before last-used tracking; their rows count as least recently used
+            self._db.execute("ALTER TABLE chunks ADD COLUMN used REAL DEFAULT 0")
+        meta = dict(self._db.execute("SELECT key, value FROM meta"))
+        if meta.get("model") != model_name:
+            self._reset()
+            self.dim = None
+        else:
+            self.dim = int(meta["dim"]) if meta.get("dim") else None
+        self._rows = dict(self._db.execute("SELECT sha256, row FROM chunks"))
+        self._vectors = None
+        self._map()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def vectors_for(self, chunks, embed_model):
+        """Return unit-normalised vectors for ``chunks``, embedding only unseen ones.
+
+        Embedding runs outside the store lock, so indexing one course does not
+        hold up lookups and builds for others.
+        """
+        with self._lock:
+            self._touch(chunks)
+            missing = self._missing(chunks)
+        while True:
+            vectors = self._embed(missing, embed_model) if missing else None
+            with self._lock:
+                if missing:
+                    # Another build may have stored some of the same chunks meanwhile
+                    fresh = [i for i, chunk in enumerate(missing) if chunk.sha256 not in self._rows]
+                    if fresh:
+                        self._append([missing[i] for i in fresh], vectors[fresh])
+                # A concurrent compaction may have evicted chunks that were stored before
+                missing = self._missing(chunks)
+                if not missing:
+                    return self._gather(chunks)
+
+    def _gather(self, chunks):
+        if not chunks:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        rows = np.fromiter((self._rows[chunk.sha256] for chunk in chunks), dtype=np.int64, count=len(chunks))
+        if rows[0] == 0 and np.array_equal(rows, np.arange(len(rows))):
+            # Common case after a fresh build: a zero-copy view of the map
+            return self._vectors[:len(rows)]
+        return np.asarray(self._vectors[rows])
+
+    def compact(self, max_rows, max_age=None, keep=()):
+        """Evict vectors unused for ``max_age`` seconds, then the least recently used beyond ``max_rows``.
+
+        Chunk hashes in ``keep`` (those of live indexes) are never evicted.
+        The vector file is rewritten without the evicted and orphaned rows.
+        """
+        with self._lock:
+            records = self._db.execute(
+                "SELECT sha256, row, source, chars, used FROM chunks ORDER BY used DESC"
+            ).fetchall()
+            cutoff = time.time() - max_age if max_age else None
+            pinned = [record for record in records if record[0] in keep]
+            others = [record for record in records
+                      if record[0] not in keep and (cutoff is None or record[4] >= cutoff)]
+            kept = pinned + others[:max(0, max_rows - len(pinned))]
+            if len(kept) == len(records) and not self.stale_rows:
+                return
+            kept.sort(key=lambda record: record[1])
+            tmp_path = self._vectors_path + ".tmp"
+            if kept:
+                np.asarray(self._vectors[[record[1] for record in kept]]).tofile(tmp_path)
+            else:
+                open(tmp_path, "wb").close()
+            self._vectors = None
+            os.replace(tmp_path, self._vectors_path)
+            kept = [(sha256, row, source, chars, used) for row, (sha256, _, source, chars, used) in enumerate(kept)]
+            with self._db:
+                self._db.execute("DELETE FROM chunks")
+                self._db.executemany("INSERT INTO chunks (sha256, row, source, chars, used) VALUES (?, ?, ?, ?, ?)",
+                                     kept)
+            self._rows = {record[0]: record[1] for record in kept}
+            self._map()
+
+    @property
+    def stale_rows(self):
+        return 0 if self._vectors is None else self._vectors.shape[0] - len(self._rows)
+
+    def _missing(self, chunks):
+        missing, seen = [], set()
+        for chunk in chunks:
+            if chunk.sha256 not in self._rows and chunk.sha256 not in seen:
+                seen.add(chunk.sha256)
+                missing.append(chunk)
+        return missing
+
+    @staticmethod
+    def _embed(chunks, embed_model):
+        vectors = []
+        for start in range(0, len(chunks), _EMBED_BATCH_SIZE):
+            batch = chunks[start:start + _EMBED_BATCH_SIZE]
+            vectors.extend(embed_model.get_text_embedding_batch([chunk.text for chunk in batch]))
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _append(self, chunks, vectors):
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            with self._db:
+                self._db.execute("INSERT OR REPLACE INTO meta VALUES ('dim', ?)", (str(self.dim),))
+
+        first_row = 0 if self._vectors is None else self._vectors.shape[0]
+        self._vectors = None
+        with open(self._vectors_path, "ab") as f:
+            vectors.tofile(f)
+        now = time.time()
+        records = [(chunk.sha256, first_row + i, chunk.source, len(chunk.text), now) for i, chunk in enumerate(chunks)]
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO chunks (sha256, row, source, chars, used) VALUES (?, ?, ?, ?, ?)", records
+            )
+        for sha256, row, _, _, _ in records:
+            self._rows[sha256] = row
+        self._map()
+
+    def _touch(self, chunks):
+        now = time.time()
+        stored = [(now, chunk.sha256) for chunk in chunks if chunk.sha256 in self._rows]
+        if stored:
+            with self._db:
+                self._db.executemany("UPDATE chunks SET used = ? WHERE sha256 = ?", stored)
+
+    def _map(self):
+        if self.dim and os.path.exists(self._vectors_path) and os.path.getsize(self._vectors_path):
+            rows = os.path.getsize(self._vectors_path) // (4 * self.dim)
+            self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+        else:
+            self._vectors = None
+
+    def _reset(self):
+        with self._db:
+            self._db.execute("DELETE FROM chunks")
+            self._db.execute("DELETE FROM meta")
+            self._db.execute("INSERT INTO meta VALUES ('model', ?)", (self.model_name,))
+        if os.path.exists(self._vectors_path):
+            os.remove(self._vectors_path)
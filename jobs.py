@@ -0,0 +1,137 @@
+"""Process-wide background job queue for work that must not block the Streamlit script."""
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """Handle shared between the worker running a task and the sessions polling it.
+
+    Workers publish intermediate output through ``partial`` and ``progress``
+    and should call ``raise_if_cancelled`` at safe points.
+    """
+
+    def __init__(self, job_id, kind, label):
+        self.id = job_id
+        self.kind = kind
+        self.label = label
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.partial = ""
+        self.progress = {}
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+        self._future = None
+
+    @property
+    def active(self):
+        return self.status in (QUEUED, RUNNING)
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def raise_if_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def sleep(self, seconds):
+        """Wait ``seconds``, raising ``JobCancelled`` as soon as the job is cancelled."""
+        if self._cancel.wait(seconds):
+            raise JobCancelled()
+
+    def child(self, suffix, kind, label):
+        """Handle for a sub-task of this job; cancelling this job cancels it too."""
+        child = Job(f"{self.id}.{suffix}", kind, label)
+        child._cancel = self._cancel
+        return child
+
+    def run(self, fn, *args, **kwargs):
+        """Run ``fn(self, *args, **kwargs)`` in the calling thread, recording its outcome."""
+        if self.cancelled:
+            self.status = CANCELLED
+            return
+        self.status = RUNNING
+        self.started = time.time()
+        try:
+            self.result = fn(self, *args, **kwargs)
+            self.status = CANCELLED if self.cancelled else DONE
+        except JobCancelled:
+            self.status = CANCELLED
+        except Exception as e:
+            self.error = e
+            self.status = FAILED
+        finally:
+            self.finished = time.time()
+
+
+class JobQueue:
+    """Runs jobs on a thread pool and keeps them until collected.
+
+    Finished jobs nobody collects (e.g. from a closed browser tab) are
+    evicted ``finished_ttl`` seconds after they finish.
+    """
+
+    def __init__(self, max_workers, name="jobs", finished_ttl=900):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self.finished_ttl = finished_ttl
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._prefix = name
+        self._lock = threading.Lock()
+
+    def submit(self, kind, label, fn, *args, **kwargs):
+        """Run ``fn(job, *args, **kwargs)`` on a worker and return the new job's ID."""
+        with self._lock:
+            self._evict_finished()
+            job = Job(f"{self._prefix}-{next(self._ids)}", kind, label)
+            self._jobs[job.id] = job
+        job._future = self._executor.submit(job.run, fn, *args, **kwargs)
+        return job.id
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None or not job.active:
+            return False
+        job._cancel.set()
+        if job._future.cancel():
+            job.status = CANCELLED
+            job.finished = time.time()
+        return True
+
+    def discard(self, job_id):
+        """Forget a finished job once its result has been collected."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and not job.active:
+                del self._jobs[job_id]
+
+    def _evict_finished(self):
+        cutoff = time.time() - self.finished_ttl
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if not job.active and job.finished is not None and job.finished < cutoff]:
+            del self._jobs[job_id]
@@ -0,0 +1,104 @@
+"""Bounded conversation memory: recent turns verbatim, older turns in a running summary."""
+import threading
+
+from tokens import count_tokens, truncate_to_tokens
+
+_MESSAGE_OVERHEAD = 4
+_EXCERPT_CHARS = 200
+
+
+class ConversationMemory:
+    """Replays a chat history within ``budget_tokens``.
+
+    The newest turns are sent verbatim; once they outgrow the verbatim
+    window, the older ones are folded into a running summary of at most
+    ``summary_tokens``, so the history sent with a follow-up stays flat in
+    size however long the session gets. Each fold leaves half the window
+    verbatim, so summarizing happens every few exchanges rather than on
+    every follow-up.
+    """
+
+    def __init__(self, budget_tokens, summary_tokens):
+        self.budget_tokens = budget_tokens
+        self.summary_tokens = summary_tokens
+        self.summary = ""
+        # History entries before this index are already folded into the summary
+        self.summarized_upto = 0
+        # Queued requests from one session may replay its history concurrently
+        self._lock = threading.Lock()
+
+    def messages(self, history, model, summarize=None):
+        """Return ChatMessages standing in for ``history`` of ``(sender, text)`` entries.
+
+        ``summarize(previous_summary, turns, max_tokens)`` condenses turns that
+        leave the verbatim window; without it (or if it fails) an extractive
+        summary is used instead.
+        """
+        with self._lock:
+            return self._messages(history, model, summarize)
+
+    def _messages(self, history, model, summarize):
+        from llama_index.core.llms import ChatMessage
+        turns = [
+            (index, sender, text) for index, (sender, text) in enumerate(history)
+            if index >= self.summarized_upto and not (sender == "ai" and text.startswith("❌ Error"))
+        ]
+
+        verbatim_budget = self.budget_tokens - self.summary_tokens
+        sizes = [count_tokens(text, model) + _MESSAGE_OVERHEAD for _, _, text in turns]
+        if sum(sizes) <= verbatim_budget:
+            kept = turns
+        else:
+            # Fold a batch: keep only the newest half of the window verbatim
+            kept, used = [], 0
+            for (index, sender, text), tokens in zip(reversed(turns), reversed(sizes)):
+                if used + tokens > verbatim_budget // 2:
+                    if not kept and verbatim_budget > _MESSAGE_OVERHEAD:
+                        # The latest turn alone fills the half: keep it, or its beginning if too long
+                        if tokens > verbatim_budget:
+                            text = truncate_to_tokens(text, verbatim_budget - _MESSAGE_OVERHEAD, model)
+                        kept.append((index, sender, text))
+                    break
+                kept.append((index, sender, text))
+                used += tokens
+            kept.reverse()
+            # Start the window on a question, not on the answer to a folded one
+            while len(kept) > 1 and kept[0][1] != "user":
+                kept.pop(0)
+
+            window_start = kept[0][0] if kept else len(history)
+            overflow = [(sender, text) for index, sender, text in turns if index < window_start]
+            if overflow:
+                self._fold(overflow, model, summarize)
+                self.summarized_upto = window_start
+
+        messages = []
+        if self.summary:
+            messages.append(ChatMessage(role="system", content=f"Summary of the earlier conversation:\n{self.summary}"))
+        for _, sender, text in kept:
+            messages.append(ChatMessage(role="user" if sender == "user" else "assistant", content=text))
+        return messages
+
+    def reset(self):
+        self.summary = ""
+        self.summarized_upto = 0
+
+    def _fold(self, turns, model, summarize):
+        summary = None
+        if summarize is not None:
+            try:
+                summary = summarize(self.summary, turns, self.summary_tokens)
+            except Exception:
+                summary = None
+        if not summary:
+            summary = _extractive_summary(self.summary, turns)
+        self.summary = truncate_to_tokens(summary.strip(), self.summary_tokens, model)
+
+
+def _extractive_summary(previous, turns):
+    lines = [previous] if previous else []
+    for sender, text in turns:
+        excerpt = " ".join(text.split())[:_EXCERPT_CHARS]
+        lines.append(f"{'Instructor' if sender == 'user' else 'Assistant'}: {excerpt}")
+    # Keep the newest lines when the summary has to be trimmed
+    return "\n".join(lines[-12:])
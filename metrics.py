@@ -0,0 +1,150 @@
+"""Process-wide timers and counters for the hot paths, with structured log output.
+
+Workers and Streamlit reruns all record into ``REGISTRY``; the admin page
+reads it back as per-operation latency percentiles, error rates and
+counter totals. Every timing is also logged as one JSON line on the
+``teach_assist.metrics`` logger.
+"""
+import json
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import config
+
+logger = logging.getLogger("teach_assist.metrics")
+
+
+def configure_logging(level="INFO"):
+    """Send ``teach_assist.*`` logs to stderr; Streamlit only configures its own loggers."""
+    root = logging.getLogger("teach_assist")
+    root.setLevel(level)
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+        root.addHandler(handler)
+        root.propagate = False
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values), max(1, math.ceil(fraction * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+class _Operation:
+    def __init__(self, max_samples):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=max_samples)
+
+
+class Metrics:
+    """Latency samples per operation (the newest ``max_samples`` of each) plus named counters."""
+
+    def __init__(self, max_samples=1000):
+        self.max_samples = max_samples
+        self.started = time.time()
+        self._operations = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, op, seconds, error=None, log_level=logging.INFO, **fields):
+        with self._lock:
+            operation = self._operations.get(op)
+            if operation is None:
+                operation = self._operations[op] = _Operation(self.max_samples)
+            operation.count += 1
+            operation.total += seconds
+            operation.samples.append(seconds)
+            if error is not None:
+                operation.errors += 1
+        if error is not None:
+            log_level = max(log_level, logging.WARNING)
+        if logger.isEnabledFor(log_level):
+            event = {"op": op, "ms": round(seconds * 1000, 1), "ok": error is None, **fields}
+            if error is not None:
+                event["error"] = f"{type(error).__name__}: {error}"
+            logger.log(log_level, json.dumps(event, default=str))
+
+    @contextmanager
+    def timer(self, op, ignore=(), log_level=logging.INFO, **fields):
+        """Time the block as ``op``; an exception counts as an error and is re-raised.
+
+        Exceptions of the ``ignore`` types (such as cancellation) are re-raised
+        without recording anything. The yielded dict can be filled with extra
+        fields for the log line.
+        """
+        start = time.perf_counter()
+        try:
+            yield fields
+        except ignore:
+            raise
+        except Exception as e:
+            self.observe(op, time.perf_counter() - start, error=e, log_level=log_level, **fields)
+            raise
+        self.observe(op, time.perf_counter() - start, log_level=log_level, **fields)
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def operations(self):
+        """Per-operation count, error rate, mean and p50/p95/p99 latency in seconds."""
+        with self._lock:
+            snapshot = {op: (o.count, o.errors, o.total, sorted(o.samples)) for op, o in self._operations.items()}
+        report = {}
+        for op, (count, errors, total, samples) in sorted(snapshot.items()):
+            report[op] = {
+                "count": count,
+                "errors": errors,
+                "error_rate": errors / count if count else 0.0,
+                "mean": total / count if count else 0.0,
+                "p50": percentile(samples, 0.50),
+                "p95": percentile(samples, 0.95),
+                "p99": percentile(samples, 0.99),
+            }
+        return report
+
+    def samples(self, op):
+        """The latency samples currently kept for ``op``, oldest first."""
+        with self._lock:
+            operation = self._operations.get(op)
+            return [] if operation is None else list(operation.samples)
+
+    def latency(self, op, fraction):
+        """``(count, seconds)``: how many samples ``op`` has and their ``fraction`` percentile."""
+        with self._lock:
+            operation = self._operations.get(op)
+            if operation is None:
+                return 0, 0.0
+            count, samples = operation.count, sorted(operation.samples)
+        return count, percentile(samples, fraction)
+
+    def hit_rates(self):
+        """Hit rate for every ``<name>.hit`` / ``<name>.miss`` counter pair."""
+        counters = self.counters()
+        rates = {}
+        for name in sorted({key.rsplit(".", 1)[0] for key in counters if key.endswith((".hit", ".miss"))}):
+            hits, misses = counters.get(f"{name}.hit", 0), counters.get(f"{name}.miss", 0)
+            rates[name] = {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses) if hits + misses else 0.0}
+        return rates
+
+    def reset(self):
+        with self._lock:
+            self._operations.clear()
+            self._counters.clear()
+            self.started = time.time()
+
+
+REGISTRY = Metrics(config.METRICS_SAMPLES)
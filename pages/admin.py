@@ -0,0 +1,91 @@
+"""Admin dashboard: latency percentiles, error rates, token counts and cache hit rates per operation."""
+import hmac
+from datetime import datetime
+
+import streamlit as st
+
+import config
+from metrics import REGISTRY
+
+st.set_page_config(page_title="Teach Assist Admin", page_icon="📊", layout="wide")
+
+if not config.ADMIN_TOKEN:
+    st.error("🔒 The admin page is disabled. Set TEACH_ASSIST_ADMIN_TOKEN to enable it.")
+    st.stop()
+# Constant-time comparison, so response timing does not reveal how much of a guess was right
+if not hmac.compare_digest(st.query_params.get("token", "").encode("utf-8"), config.ADMIN_TOKEN.encode("utf-8")):
+    st.error("🔒 Add ?token=... with the TEACH_ASSIST_ADMIN_TOKEN value to the URL to view this page.")
+    st.stop()
+
+st.title("📊 Teach Assist Metrics")
+st.caption(
+    f"Since {datetime.fromtimestamp(REGISTRY.started).strftime('%Y-%m-%d %H:%M:%S')} · "
+    f"percentiles over the last {REGISTRY.max_samples} samples of each operation"
+)
+
+col_refresh, col_reset, _ = st.columns([1, 1, 4])
+with col_refresh:
+    if st.button("🔄 Refresh", use_container_width=True):
+        st.rerun()
+with col_reset:
+    if st.button("🗑️ Reset", use_container_width=True):
+        REGISTRY.reset()
+        st.rerun()
+
+st.subheader("Latency and errors")
+operations = REGISTRY.operations()
+if operations:
+    st.dataframe([
+        {
+            "operation": op,
+            "count": stats["count"],
+            "errors": stats["errors"],
+            "error rate": f"{stats['error_rate']:.1%}",
+            "p50 ms": round(stats["p50"] * 1000, 1),
+            "p95 ms": round(stats["p95"] * 1000, 1),
+            "p99 ms": round(stats["p99"] * 1000, 1),
+            "mean ms": round(stats["mean"] * 1000, 1),
+        }
+        for op, stats in operations.items()
+    ], use_container_width=True, hide_index=True)
+else:
+    st.caption("No operations recorded yet")
+
+st.subheader("Tokens")
+counters = REGISTRY.counters()
+kinds = sorted({name.split(".")[1] for name in counters if name.startswith("tokens.")})
+if kinds:
+    rows = []
+    for kind in kinds:
+        prompt_tokens = counters.get(f"tokens.{kind}.prompt", 0)
+        cached_tokens = counters.get(f"tokens.{kind}.cached_prompt", 0)
+        rows.append({
+            "kind": kind,
+            "prompt tokens": prompt_tokens,
+            "completion tokens": counters.get(f"tokens.{kind}.completion", 0),
+            "cached prompt tokens": cached_tokens,
+            "prompt cache hit rate": f"{cached_tokens / prompt_tokens:.1%}" if prompt_tokens else "–",
+        })
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+else:
+    st.caption("No LLM requests yet")
+
+st.subheader("Request resilience")
+resilience_counters = {name: value for name, value in counters.items()
+                       if name.startswith(("llm.retry", "llm.hedge.", "llm.breaker.", "llm.deadline"))
+                       or name == "retrieval.fallback"}
+if resilience_counters:
+    st.dataframe([{"event": name, "count": value} for name, value in sorted(resilience_counters.items())],
+                 use_container_width=True, hide_index=True)
+else:
+    st.caption("No retries, hedges, deadline misses, breaker trips or retrieval fallbacks")
+
+st.subheader("Cache hit rates")
+hit_rates = REGISTRY.hit_rates()
+if hit_rates:
+    st.dataframe([
+        {"cache": name, "hits": stats["hits"], "misses": stats["misses"], "hit rate": f"{stats['hit_rate']:.1%}"}
+        for name, stats in hit_rates.items()
+    ], use_container_width=True, hide_index=True)
+else:
+    st.caption("No cache lookups yet")
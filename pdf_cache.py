@@ -0,0 +1,66 @@
+"""In-memory caches for PDF export; ReportLab is only imported once something is rendered."""
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class PdfCache:
+    """Bounded LRU of rendered PDF bytes keyed by content hash and title."""
+
+    def __init__(self, max_entries=16, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(content, title):
+        return hashlib.sha256(content.encode("utf-8")).hexdigest(), title
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def put(self, key, data):
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+            self._entries[key] = data
+            self._size += len(data)
+            while self._entries and (len(self._entries) > self.max_entries or self._size > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+class FlowableCache:
+    """Bounded LRU of converted flowables keyed by content hash and frame width.
+
+    ReportLab keeps layout state on flowables (split paragraphs, table
+    sizes), so the cached list is never laid out itself: every caller gets
+    a fresh deep copy of it.
+    """
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, content, width):
+        key = hashlib.sha256(content.encode("utf-8")).hexdigest(), width
+        with self._lock:
+            flowables = self._entries.get(key)
+            if flowables is not None:
+                self._entries.move_to_end(key)
+                return copy.deepcopy(flowables)
+        from pdf_export import markdown_to_flowables
+        flowables = markdown_to_flowables(content, width)
+        with self._lock:
+            self._entries[key] = flowables
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return copy.deepcopy(flowables)
@@ -0,0 +1,286 @@
+"""PDF export for generated teaching content.
+
+Markdown is tokenized in a single pass over its lines with precompiled
+patterns, then each block token maps to one or more ReportLab flowables.
+"""
+import io
+import re
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_CENTER
+from reportlab.platypus import (
+    HRFlowable,
+    PageBreak,
+    Paragraph,
+    Preformatted,
+    SimpleDocTemplate,
+    Spacer,
+    Table,
+    TableStyle,
+)
+from reportlab.platypus.tableofcontents import TableOfContents
+
+Token = namedtuple("Token", ["kind", "text", "level", "marker", "rows"], defaults=(0, None, None))
+
+_FENCE = re.compile(r"^\s*(```|~~~)\s*([\w+-]*)\s*$")
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)(?:\s+#+)?\s*$")
+_RULE = re.compile(r"^\s{0,3}([-*_])(?:\s*\1){2,}\s*$")
+_BULLET = re.compile(r"^(\s*)[-*+]\s+(.*)$")
+_ORDERED = re.compile(r"^(\s*)(\d+)[.)]\s+(.*)$")
+_QUOTE = re.compile(r"^\s*>\s?(.*)$")
+_TABLE_ROW = re.compile(r"^\s*\|.*\|\s*$")
+_TABLE_SEPARATOR = re.compile(r"^\s*\|?\s*:?-+:?\s*(?:\|\s*:?-+:?\s*)*\|?\s*$")
+_INLINE = re.compile(
+    r"`([^`]+)`"
+    r"|\*\*(.+?)\*\*|__(.+?)__"
+    r"|\*(?=\S)(.+?)(?<=\S)\*|(?<!\w)_(?=\S)(.+?)(?<=\S)_(?!\w)"
+    r"|\[([^\]]+)\]\(([^)\s]+)\)"
+)
+_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})
+
+_CODE_LINE_LENGTH = 90
+
+
+def tokenize_markdown(text):
+    """Split Markdown into block tokens: heading, paragraph, bullet/ordered
+    list items, table, code, quote and rule."""
+    tokens = []
+    paragraph = []
+    lines = text.splitlines()
+    i = 0
+
+    def flush_paragraph():
+        if paragraph:
+            tokens.append(Token("paragraph", " ".join(paragraph)))
+            del paragraph[:]
+
+    while i < len(lines):
+        line = lines[i]
+        if not line.strip():
+            flush_paragraph()
+            i += 1
+            continue
+
+        fence = _FENCE.match(line)
+        if fence:
+            flush_paragraph()
+            code, i = [], i + 1
+            while i < len(lines) and not lines[i].strip().startswith(fence.group(1)):
+                code.append(lines[i])
+                i += 1
+            tokens.append(Token("code", "\n".join(code)))
+            i += 1
+            continue
+
+        if _TABLE_ROW.match(line) and i + 1 < len(lines) and _TABLE_SEPARATOR.match(lines[i + 1]):
+            flush_paragraph()
+            rows = [_table_cells(line)]
+            i += 2
+            while i < len(lines) and _TABLE_ROW.match(lines[i]):
+                rows.append(_table_cells(lines[i]))
+                i += 1
+            tokens.append(Token("table", "", rows=rows))
+            continue
+
+        match = _HEADING.match(line)
+        if match:
+            flush_paragraph()
+            tokens.append(Token("heading", match.group(2), len(match.group(1))))
+        elif _RULE.match(line):
+            flush_paragraph()
+            tokens.append(Token("rule", ""))
+        elif _BULLET.match(line):
+            flush_paragraph()
+            match = _BULLET.match(line)
+            tokens.append(Token("bullet", match.group(2), _indent_level(match.group(1))))
+        elif _ORDERED.match(line):
+            flush_paragraph()
+            match = _ORDERED.match(line)
+            tokens.append(Token("ordered", match.group(3), _indent_level(match.group(1)), match.group(2)))
+        elif _QUOTE.match(line):
+            flush_paragraph()
+            tokens.append(Token("quote", _QUOTE.match(line).group(1)))
+        elif tokens and not paragraph and tokens[-1].kind in ("bullet", "ordered") and line[:1].isspace():
+            # Lazy continuation of the previous list item
+            last = tokens[-1]
+            tokens[-1] = last._replace(text=f"{last.text} {line.strip()}")
+        else:
+            paragraph.append(line.strip())
+        i += 1
+
+    flush_paragraph()
+    return tokens
+
+
+def _indent_level(indent):
+    return len(indent.replace("\t", "    ")) // 2
+
+
+def _table_cells(line):
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def escape(text):
+    return text.translate(_ESCAPES)
+
+
+def render_inline(text):
+    """Convert inline Markdown to ReportLab paragraph markup, escaping the rest."""
+    return _INLINE.sub(_render_inline_match, escape(text))
+
+
+def _render_inline_match(match):
+    code, strong, strong_alt, em, em_alt, link_text, link_url = match.groups()
+    if code is not None:
+        return f'<font name="Courier">{code}</font>'
+    if strong is not None or strong_alt is not None:
+        return f"<b>{_INLINE.sub(_render_inline_match, strong or strong_alt)}</b>"
+    if em is not None or em_alt is not None:
+        return f"<i>{_INLINE.sub(_render_inline_match, em or em_alt)}</i>"
+    return f'<link href="{link_url}" color="blue">{_INLINE.sub(_render_inline_match, link_text)}</link>'
+
+
+@lru_cache(maxsize=1)
+def _styles():
+    sample = getSampleStyleSheet()
+    body = ParagraphStyle("ContentStyle", parent=sample["Normal"], fontSize=11, leading=15, spaceAfter=8)
+    return {
+        "title": ParagraphStyle("CustomTitle", parent=sample["Heading1"], fontSize=18, spaceAfter=30, alignment=TA_CENTER),
+        "date": sample["Normal"],
+        "body": body,
+        "h1": ParagraphStyle("MdHeading1", parent=sample["Heading1"], fontSize=16, spaceBefore=12, spaceAfter=8),
+        "h2": ParagraphStyle("MdHeading2", parent=sample["Heading2"], fontSize=14, spaceBefore=10, spaceAfter=6),
+        "h3": ParagraphStyle("MdHeading3", parent=sample["Heading3"], fontSize=12, spaceBefore=8, spaceAfter=4),
+        "h4": ParagraphStyle("MdHeading4", parent=sample["Heading4"], fontSize=11, spaceBefore=6, spaceAfter=4),
+        "quote": ParagraphStyle("MdQuote", parent=body, leftIndent=18, textColor=colors.HexColor("#555555"),
+                                fontName="Helvetica-Oblique"),
+        "code": ParagraphStyle("MdCode", parent=sample["Code"], fontSize=9, leading=11,
+                               backColor=colors.HexColor("#F4F6F8"), borderPadding=6, spaceBefore=4, spaceAfter=10),
+        "cell": ParagraphStyle("MdCell", parent=body, fontSize=9.5, leading=12, spaceAfter=0),
+    }
+
+
+def tokens_to_flowables(tokens, width=A4[0] - 144):
+    """Map block tokens to ReportLab flowables for a frame ``width`` points wide."""
+    styles = _styles()
+    story = []
+    for token in tokens:
+        kind = token.kind
+        if kind == "paragraph":
+            story.append(Paragraph(render_inline(token.text), styles["body"]))
+        elif kind == "heading":
+            story.append(Paragraph(render_inline(token.text), styles[f"h{min(token.level, 4)}"]))
+        elif kind in ("bullet", "ordered"):
+            bullet = "•" if kind == "bullet" else f"{token.marker}."
+            story.append(Paragraph(render_inline(token.text), _list_style(token.level), bulletText=bullet))
+        elif kind == "code":
+            story.append(Preformatted(token.text, styles["code"], maxLineLength=_CODE_LINE_LENGTH, newLineChars=""))
+        elif kind == "quote":
+            story.append(Paragraph(render_inline(token.text), styles["quote"]))
+        elif kind == "rule":
+            story.append(HRFlowable(width="100%", thickness=0.5, color=colors.HexColor("#CCCCCC"),
+                                    spaceBefore=4, spaceAfter=8))
+        elif kind == "table":
+            story.append(_table(token.rows, width))
+    return story
+
+
+@lru_cache(maxsize=8)
+def _list_style(level):
+    indent = 18 * (level + 1)
+    return ParagraphStyle(f"MdList{level}", parent=_styles()["body"], leftIndent=indent,
+                          bulletIndent=indent - 12, spaceAfter=3)
+
+
+def _table(rows, width):
+    columns = max(len(row) for row in rows)
+    cell_style = _styles()["cell"]
+    data = []
+    for r, row in enumerate(rows):
+        cells = row + [""] * (columns - len(row))
+        markup = [render_inline(cell) for cell in cells]
+        if r == 0:
+            markup = [f"<b>{cell}</b>" for cell in markup]
+        data.append([Paragraph(cell, cell_style) for cell in markup])
+    table = Table(data, colWidths=[width / columns] * columns, repeatRows=1)
+    table.setStyle(TableStyle([
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#CCCCCC")),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#E7ECEF")),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ]))
+    return table
+
+
+def markdown_to_flowables(content, width=A4[0] - 144):
+    return tokens_to_flowables(tokenize_markdown(content), width)
+
+
+def create_pdf_from_content(content, title="Teach Assist Content"):
+    """Create a PDF from the given Markdown content"""
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
+    styles = _styles()
+
+    story = [Paragraph(escape(title), styles["title"])]
+    date_str = datetime.now().strftime("%B %d, %Y at %I:%M %p")
+    story.append(Paragraph(f"<i>Generated on {date_str}</i>", styles["date"]))
+    story.append(Spacer(1, 20))
+    story.extend(markdown_to_flowables(content, doc.width))
+
+    doc.build(story)
+    buffer.seek(0)
+    return buffer
+
+
+class _SessionDocTemplate(SimpleDocTemplate):
+    """Registers every section heading with the table of contents and outline."""
+
+    def afterFlowable(self, flowable):
+        bookmark = getattr(flowable, "_toc_bookmark", None)
+        if bookmark is None:
+            return
+        text = flowable.getPlainText()
+        self.canv.bookmarkPage(bookmark)
+        self.canv.addOutlineEntry(text, bookmark, level=0)
+        self.notify("TOCEntry", (0, text, self.page, bookmark))
+
+
+def create_session_pdf(sections, title="Teach Assist Session", flowable_cache=None):
+    """Render ``(heading, content)`` sections as one PDF with a table of contents.
+
+    With a ``flowable_cache``, each section's body is converted once and
+    copied for later exports instead of being parsed again.
+    """
+    buffer = io.BytesIO()
+    doc = _SessionDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72,
+                              title=title)
+    styles = _styles()
+
+    toc = TableOfContents()
+    toc.levelStyles = [ParagraphStyle("TocEntry", parent=styles["body"], leftIndent=12, firstLineIndent=-12,
+                                      spaceAfter=4)]
+    story = [Paragraph(escape(title), styles["title"])]
+    date_str = datetime.now().strftime("%B %d, %Y at %I:%M %p")
+    story.append(Paragraph(f"<i>Generated on {date_str}</i>", styles["date"]))
+    story.append(Spacer(1, 20))
+    story.append(Paragraph("Contents", styles["h2"]))
+    story.append(toc)
+
+    for number, (heading, content) in enumerate(sections, start=1):
+        story.append(PageBreak())
+        section_title = Paragraph(f"{number}. {escape(heading)}", styles["h1"])
+        section_title._toc_bookmark = f"section-{number}"
+        story.append(section_title)
+        if flowable_cache is not None:
+            story.extend(flowable_cache.get_or_build(content, doc.width))
+        else:
+            story.extend(markdown_to_flowables(content, doc.width))
+
+    doc.multiBuild(story)
+    buffer.seek(0)
+    return buffer
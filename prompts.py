@@ -0,0 +1,98 @@
+"""Prompt assembly with byte-stable prefixes, so provider-side prompt caching can hit.
+
+Every request is laid out as fixed instructions first, then the
+canonicalized course context, then the parts that vary per request
+(conversation history, the instructor's message). Equal inputs always give
+equal bytes, so repeated queries against one course share a cached prefix.
+"""
+import re
+
+_TRAILING_SPACE = re.compile(r"[ \t]+$", re.MULTILINE)
+_BLANK_RUNS = re.compile(r"\n{3,}")
+
+
+def canonicalize(text):
+    """Normalize line endings and whitespace so equal content gives equal bytes."""
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = _TRAILING_SPACE.sub("", text)
+    return _BLANK_RUNS.sub("\n\n", text).strip()
+
+
+ASSISTANT_INSTRUCTIONS = canonicalize("""
+You are Teach Assist, an AI-powered teaching companion designed to help instructors create engaging lesson plans, teaching materials, and educational content.
+
+Based on the curriculum and pedagogy information in the course context below, help the instructor with their request.
+Be specific, practical, and reference the course content when relevant.
+Create detailed, actionable responses that instructors can use immediately.
+
+For longer content like lesson plans, quizzes, or assignments, provide comprehensive, well-structured responses with clear formatting.
+""")
+
+SUMMARY_INSTRUCTIONS = "You write terse, factual conversation summaries."
+
+SUMMARY_REQUEST = canonicalize("""
+Update the summary of a conversation between an instructor and a teaching assistant.
+Keep requests, decisions and the key content of generated materials (module, question numbers, topics) so follow-ups can refer to them.
+""")
+
+# file name -> (system prompt, instructions); the course description goes last
+COURSE_FILE_PROMPTS = {
+    "curriculum.md": (
+        "You are an expert curriculum designer. Create detailed, practical curriculum files.",
+        canonicalize("""
+Create a detailed curriculum.md file for the course described below.
+
+Format it as a proper markdown file with sections for:
+- Course Title
+- Course Description
+- Learning Objectives
+- Prerequisites
+- Course Modules (with topics and key concepts)
+- Assessment Methods
+- Resources
+- Course Schedule
+
+Make it comprehensive and well-structured.
+"""),
+    ),
+    "pedagogy.md": (
+        "You are an expert in educational pedagogy. Create detailed, practical teaching guides.",
+        canonicalize("""
+Create a detailed pedagogy.md file for the course described below.
+
+Format it as a proper markdown file with sections for:
+- Teaching Philosophy
+- Target Audience
+- Learning Styles Accommodation
+- Teaching Methods
+- Assessment Strategies
+- Engagement Techniques
+- Technology Integration
+- Differentiation Strategies
+- Classroom Management
+- Support Resources
+
+Make it practical and actionable for instructors.
+"""),
+    ),
+}
+
+
+def chat_system_prompt(course_context):
+    return f"{ASSISTANT_INSTRUCTIONS}\n\nCOURSE CONTEXT:\n{canonicalize(course_context)}"
+
+
+def course_file_prompt(file_name, description):
+    """Return ``(system_prompt, user_prompt)`` for generating ``file_name``."""
+    system_prompt, instructions = COURSE_FILE_PROMPTS[file_name]
+    return system_prompt, f"{instructions}\n\nCOURSE DESCRIPTION:\n{canonicalize(description)}"
+
+
+def summary_prompt(previous_summary, turns):
+    """Return ``(system_prompt, user_prompt)`` folding ``(sender, text)`` turns into the summary."""
+    transcript = "\n\n".join(
+        f"{'Instructor' if sender == 'user' else 'Assistant'}: {canonicalize(text)}" for sender, text in turns
+    )
+    user_prompt = (f"{SUMMARY_REQUEST}\n\nCURRENT SUMMARY:\n{canonicalize(previous_summary) or '(none)'}"
+                   f"\n\nNEW TURNS:\n{transcript}")
+    return SUMMARY_INSTRUCTIONS, user_prompt
@@ -0,0 +1,336 @@
+"""Retries, deadlines, hedged requests and a circuit breaker around LLM calls.
+
+Transient provider errors (429s, 5xx, timeouts, dropped connections) are
+retried with full-jitter exponential backoff, waiting at least as long as
+the provider's ``Retry-After`` asks. Each request has a deadline covering all
+its attempts. Optionally a duplicate request is sent when a call outlives
+the recent p95 latency of its operation, and the first answer wins. After
+repeated failed requests the circuit breaker fails calls fast instead of
+piling more load onto a struggling provider. Streams must start within a
+first-token deadline. Retries, hedges and breaker trips are counted in the
+metrics registry.
+"""
+import email.utils
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from jobs import JobCancelled
+from metrics import REGISTRY
+
+# Status codes worth another attempt: timeouts, conflicts, rate limits and server errors
+_RETRYABLE_STATUS = {408, 409, 429}
+# Exception class names (anywhere in the MRO) of openai / httpx transport failures
+_RETRYABLE_ERRORS = {
+    "RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError",
+    "TimeoutException", "NetworkError", "RemoteProtocolError",
+}
+# How often waits wake up to notice a cancelled job
+_WAIT_SLICE = 0.25
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the provider while the circuit breaker is open."""
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class FirstTokenTimeout(TimeoutError):
+    """A stream sent nothing within the first-token deadline; retried like any timeout."""
+
+
+class SlotWatch:
+    """Lets the HTTP transport report, for requests made on this thread, when they queue for and get a slot.
+
+    Setting ``abandoned`` makes a request still queued give up instead of
+    being sent. ``client_pool.BoundedTransport`` honours it; with other
+    transports nothing is reported.
+    """
+
+    _local = threading.local()
+
+    def __init__(self):
+        self.queued = False
+        self.acquired_at = None
+        self.abandoned = threading.Event()
+
+    @classmethod
+    def current(cls):
+        return getattr(cls._local, "watch", None)
+
+    def __enter__(self):
+        self._local.watch = self
+        return self
+
+    def __exit__(self, *exc_info):
+        self._local.watch = None
+
+
+def _close(iterator):
+    close = getattr(iterator, "close", None)
+    if close is not None:
+        try:
+            close()
+        except Exception:
+            pass
+
+
+def status_code(error):
+    return getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+
+
+def is_retryable(error):
+    status = status_code(error)
+    if status is not None:
+        return status in _RETRYABLE_STATUS or status >= 500
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return any(cls.__name__ in _RETRYABLE_ERRORS for cls in type(error).__mro__)
+
+
+def retry_after(error):
+    """Seconds the provider asked us to wait (``Retry-After`` / ``retry-after-ms``), or None."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            # An HTTP date rather than a number of seconds
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failed requests and fails calls for ``reset_timeout`` seconds.
+
+    Once the timeout passes one trial call is let through (half-open): its
+    success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Raise ``CircuitOpenError`` unless a call may go out now."""
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._trial_running = False
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return
+            wait_for = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+        REGISTRY.increment("llm.breaker.rejected")
+        raise CircuitOpenError(f"The model provider is failing; requests are paused for another {wait_for:.0f}s")
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def release(self):
+        """Let another trial through after one ended without an outcome (e.g. it was cancelled)."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    REGISTRY.increment("llm.breaker.opened")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self._trial_running = False
+
+
+class RequestPolicy:
+    """Runs provider calls with retries, a deadline, optional hedging and a shared circuit breaker.
+
+    ``deadline`` (seconds, 0 for none) bounds a request across all its
+    attempts and backoff waits. With ``hedge`` set, an attempt still running
+    after the p95 latency of its operation (``hedge_delay`` until
+    ``hedge_min_samples`` latencies are recorded) gets a duplicate request,
+    and whichever answers first wins. Attempts past the deadline, and hedges
+    that lose, are abandoned rather than interrupted; the HTTP timeout ends them.
+    A request counts once towards the circuit breaker, however many attempts
+    it took. ``first_token_deadline`` (0 for none) bounds the wait for the
+    first chunk of a stream, see ``first_item``.
+    """
+
+    def __init__(self, retries=4, base_delay=1.0, max_delay=30.0, deadline=120.0, hedge=False, hedge_delay=10.0,
+                 hedge_min_samples=20, breaker=None, max_workers=32, first_token_deadline=30.0):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker or CircuitBreaker(0)
+        self.first_token_deadline = first_token_deadline
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-call")
+
+    def call(self, op, fn, job=None, hedge=True, enforce_deadline=True, should_retry=None):
+        """Return ``fn()``, retrying transient errors; ``op`` names the metric whose latency sets the hedge delay.
+
+        Pass ``hedge=False`` for calls that must not run twice, such as
+        streams, and ``should_retry(error)`` to narrow which errors are
+        retried. With ``enforce_deadline=False`` an attempt runs to completion
+        in the calling thread and the deadline only stops further retries.
+        """
+        self.breaker.allow()
+        try:
+            result = self._retry(op, fn, job, hedge and self.hedge, enforce_deadline, should_retry or is_retryable)
+        except JobCancelled:
+            self.breaker.release()
+            raise
+        except Exception as e:
+            if is_retryable(e):
+                self.breaker.record_failure()
+            elif status_code(e) is not None:
+                # A rejected request (e.g. a 400) still shows the provider is up
+                self.breaker.record_success()
+            else:
+                # Other errors are ours
+                self.breaker.release()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def first_item(self, iterator, job=None):
+        """Return ``next(iterator, None)``, raising ``FirstTokenTimeout`` after ``first_token_deadline`` seconds.
+
+        Meant for the first chunk of a stream. Time spent queued for a
+        connection slot does not count; the pool timeout bounds that. After a
+        timeout or cancellation a request still queued is never sent, and one
+        already sent is closed as soon as its late chunk arrives, so
+        ``iterator`` must not be closed by the caller.
+        """
+        if not self.first_token_deadline:
+            return next(iterator, None)
+        watch = SlotWatch()
+
+        def first():
+            with watch:
+                return next(iterator, None)
+
+        future = self._executor.submit(first)
+        start = time.monotonic()
+        try:
+            while True:
+                if watch.queued and watch.acquired_at is None:
+                    # Still waiting for a slot: the deadline has not started
+                    timeout = _WAIT_SLICE
+                else:
+                    timeout = (watch.acquired_at or start) + self.first_token_deadline - time.monotonic()
+                    if timeout <= 0:
+                        REGISTRY.increment("llm.deadline_first_token")
+                        raise FirstTokenTimeout(f"The model sent nothing within {self.first_token_deadline:g}s")
+                if self._wait([future], timeout, job):
+                    return future.result()
+        except BaseException:
+            watch.abandoned.set()
+            future.add_done_callback(lambda _: _close(iterator))
+            raise
+
+    def _retry(self, op, fn, job, hedge, enforce_deadline, should_retry):
+        deadline = time.monotonic() + self.deadline if self.deadline else None
+        for attempt in range(self.retries + 1):
+            try:
+                return self._attempt(op, fn, job, hedge, deadline if enforce_deadline else None)
+            except DeadlineExceeded:
+                REGISTRY.increment("llm.deadline_exceeded")
+                raise
+            except Exception as e:
+                if attempt == self.retries or not is_retryable(e) or not should_retry(e):
+                    raise
+                # Stop retrying once other requests have opened the circuit
+                if self.breaker.state == OPEN:
+                    raise
+                delay = self.backoff(attempt, retry_after(e))
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    raise
+                REGISTRY.increment("llm.retry")
+                if job is not None:
+                    job.sleep(delay)
+                else:
+                    time.sleep(delay)
+
+    def backoff(self, attempt, requested=None):
+        """Full-jitter exponential delay, but never shorter than the provider's ``Retry-After``."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return max(delay, min(requested, self.max_delay)) if requested is not None else delay
+
+    def hedge_after(self, op):
+        count, p95 = REGISTRY.latency(op, 0.95)
+        return p95 if count >= self.hedge_min_samples else self.hedge_delay
+
+    def _attempt(self, op, fn, job, hedge, deadline):
+        if deadline is None and not hedge:
+            return fn()
+        futures = [self._executor.submit(fn)]
+        if hedge:
+            primary_wait = self.hedge_after(op)
+            if deadline is not None:
+                primary_wait = min(primary_wait, deadline - time.monotonic())
+            if not self._wait(futures, primary_wait, job) and (deadline is None or time.monotonic() < deadline):
+                REGISTRY.increment("llm.hedge.launched")
+                futures.append(self._executor.submit(fn))
+
+        pending, error = set(futures), None
+        while pending:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise DeadlineExceeded(f"No answer from the model within {self.deadline:g}s")
+            done = self._wait(pending, remaining, job)
+            pending -= done
+            for future in done:
+                if future.exception() is None:
+                    if future is not futures[0]:
+                        REGISTRY.increment("llm.hedge.won")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    @staticmethod
+    def _wait(futures, timeout, job):
+        """Wait up to ``timeout`` seconds for any of ``futures``, checking ``job`` for cancellation."""
+        end = None if timeout is None else time.monotonic() + max(0.0, timeout)
+        while True:
+            slice_timeout = _WAIT_SLICE if end is None else min(_WAIT_SLICE, max(0.0, end - time.monotonic()))
+            done, _ = wait(futures, timeout=slice_timeout, return_when=FIRST_COMPLETED)
+            if done:
+                return done
+            if job is not None:
+                job.raise_if_cancelled()
+            if end is not None and time.monotonic() >= end:
+                return set()
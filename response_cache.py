@@ -0,0 +1,79 @@
+"""LRU response cache with a TTL and an SQLite backing store that survives restarts."""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_cache_key(model, temperature, max_tokens, system_prompt, user_message, history=()):
+    """Key a response by its request; ``history`` is the replayed conversation, if any."""
+    system_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+    history_hash = hashlib.sha256("\0".join(f"{role}:{text}" for role, text in history).encode("utf-8")).hexdigest()
+    raw = f"{model}\0{temperature}\0{max_tokens}\0{system_hash}\0{history_hash}\0{user_message}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Keeps the ``max_entries`` most recently used responses in memory.
+
+    Every entry is also written to disk, so a restarted process warms its
+    memory tier lazily from there. Entries older than ``ttl`` seconds are
+    treated as misses and pruned; the disk store is capped at ``max_disk_entries``.
+    """
+
+    def __init__(self, path, max_entries=256, ttl=7 * 24 * 3600, max_disk_entries=5000):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, created REAL NOT NULL, accessed REAL NOT NULL, response TEXT NOT NULL)"
+        )
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                row = self._db.execute("SELECT created, response FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    entry = (row[0], row[1])
+                    self._remember(key, entry)
+            if entry is None or now - entry[0] > self.ttl:
+                if entry is not None:
+                    self._forget(key)
+                return None
+            self._memory.move_to_end(key)
+            with self._db:
+                self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            return entry[1]
+
+    def put(self, key, response):
+        now = time.time()
+        with self._lock:
+            self._remember(key, (now, response))
+            with self._db:
+                self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, now, now, response))
+                self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+                self._db.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,),
+                )
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _forget(self, key):
+        self._memory.pop(key, None)
+        with self._db:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
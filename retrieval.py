@@ -0,0 +1,119 @@
+"""Chunking, embedding and top-k retrieval over the loaded course documents."""
+import hashlib
+import re
+from collections import namedtuple
+
+import numpy as np
+
+Chunk = namedtuple("Chunk", ["text", "source", "sha256"])
+
+_PARAGRAPH_SPLIT = re.compile(r"\n\s*\n")
+_EMBED_BATCH_SIZE = 64
+
+
+def estimate_tokens(text):
+    # Roughly four characters per token for English prose
+    return (len(text) + 3) // 4
+
+
+def chunk_documents(documents, chunk_tokens):
+    """Split documents into paragraph-aligned chunks of at most ``chunk_tokens``."""
+    chunks = []
+    for doc in documents:
+        source = doc.metadata.get("file_name", "") if doc.metadata else ""
+        for text in _split_text(doc.text, chunk_tokens):
+            sha256 = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            chunks.append(Chunk(text, source, sha256))
+    return chunks
+
+
+def _split_text(text, chunk_tokens):
+    current, current_tokens = [], 0
+    for paragraph in _PARAGRAPH_SPLIT.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        for piece in _split_paragraph(paragraph, chunk_tokens):
+            piece_tokens = estimate_tokens(piece)
+            if current and current_tokens + piece_tokens > chunk_tokens:
+                yield "\n\n".join(current)
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        yield "\n\n".join(current)
+
+
+def _split_paragraph(paragraph, chunk_tokens):
+    if estimate_tokens(paragraph) <= chunk_tokens:
+        return [paragraph]
+    pieces, current = [], []
+    for word in paragraph.split():
+        current.append(word)
+        if estimate_tokens(" ".join(current)) >= chunk_tokens:
+            pieces.append(" ".join(current))
+            current = []
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class ChunkIndex:
+    """In-memory cosine-similarity index over course chunks."""
+
+    def __init__(self, chunks, vectors, normalized=False):
+        self.chunks = chunks
+        self.vectors = vectors if normalized else _normalize(np.asarray(vectors, dtype=np.float32))
+
+    @classmethod
+    def build(cls, documents, embed_model, chunk_tokens, store=None):
+        """Chunk and embed ``documents``; with a ``store``, reuse persisted vectors."""
+        chunks = chunk_documents(documents, chunk_tokens)
+        if store is not None:
+            return cls(chunks, store.vectors_for(chunks, embed_model), normalized=True)
+        vectors = []
+        for start in range(0, len(chunks), _EMBED_BATCH_SIZE):
+            batch = chunks[start:start + _EMBED_BATCH_SIZE]
+            vectors.extend(embed_model.get_text_embedding_batch([chunk.text for chunk in batch]))
+        if not vectors:
+            return cls(chunks, np.zeros((0, 0), dtype=np.float32))
+        return cls(chunks, vectors)
+
+    def search(self, query_vector, top_k):
+        """Return ``(position, score)`` pairs for the ``top_k`` closest chunks."""
+        if not self.chunks:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        scores = self.vectors @ query
+        top_k = min(top_k, len(scores))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+        return [(int(i), float(scores[i])) for i in best]
+
+    def select_context(self, query, embed_model, top_k, token_budget):
+        """Assemble the most relevant chunks for ``query`` within ``token_budget``.
+
+        Chunks are admitted in relevance order until the budget is spent, then
+        put back into document order so the excerpt reads coherently.
+        """
+        hits = self.search(embed_model.get_query_embedding(query), top_k)
+        selected, used = [], 0
+        for position, _ in hits:
+            tokens = estimate_tokens(self.chunks[position].text)
+            if used + tokens > token_budget:
+                continue
+            selected.append(position)
+            used += tokens
+        sections = []
+        for position in sorted(selected):
+            chunk = self.chunks[position]
+            header = f"[{chunk.source}]\n" if chunk.source else ""
+            sections.append(header + chunk.text)
+        return "\n\n---\n\n".join(sections)
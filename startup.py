@@ -0,0 +1,30 @@
+"""Phase timings for a script run, reported for the first run of the process and of each session."""
+import logging
+import time
+
+logger = logging.getLogger("teach_assist.startup")
+
+
+class RunTimer:
+    """Records how long each phase of one script run took, in the order they ran."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    @property
+    def total(self):
+        return self._last - self.started
+
+    def report(self):
+        return " · ".join(f"{phase} {seconds * 1000:.0f}ms" for phase, seconds in self.phases) + \
+            f" · total {self.total * 1000:.0f}ms"
+
+    def log(self, label):
+        logger.info("%s: %s", label, self.report())
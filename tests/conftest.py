@@ -0,0 +1,36 @@
+"""Shared fixtures; the tests run offline, without LlamaIndex or tiktoken encodings installed."""
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from llama_index.core.llms import ChatMessage  # noqa: F401
+except ImportError:
+    class ChatMessage:
+        def __init__(self, role, content=None):
+            self.role = role
+            self.content = content
+
+    # Only ChatMessage is needed: memory.py builds its replayed history from it
+    for name in ("llama_index", "llama_index.core", "llama_index.core.llms"):
+        sys.modules.setdefault(name, types.ModuleType(name))
+    sys.modules["llama_index.core.llms"].ChatMessage = ChatMessage
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    # Count tokens with the offline estimate (4 characters each), never fetching tiktoken encodings
+    import tokens
+    monkeypatch.setattr(tokens, "_encoding", lambda model: None)
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    from metrics import REGISTRY
+    REGISTRY.reset()
+    yield
+    REGISTRY.reset()
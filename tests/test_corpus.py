@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import corpus
+from corpus import CorpusCache
+
+
+@pytest.fixture
+def parsed(monkeypatch):
+    """Parse files as one plain-text document each, recording every parse."""
+    calls = []
+
+    def parse(path):
+        calls.append(os.path.basename(path))
+        with open(path, encoding="utf-8") as f:
+            return [SimpleNamespace(text=f.read(), metadata={"file_name": os.path.basename(path)})]
+
+    monkeypatch.setattr(corpus, "_parse", parse)
+    return calls
+
+
+def write(directory, name, text):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_unchanged_directory_returns_the_same_corpus(tmp_path, parsed):
+    course = str(tmp_path / "course")
+    write(course, "a.md", "# Notes A")
+    write(course, "b.md", "# Notes B")
+    cache = CorpusCache()
+    first = cache.load(course)
+    assert first.context == "# Notes A\n\n# Notes B"
+    assert cache.load(course) is first
+    assert parsed == ["a.md", "b.md"]
+
+
+def test_only_changed_files_are_parsed_again(tmp_path, parsed):
+    course = str(tmp_path / "course")
+    write(course, "a.md", "# Notes A")
+    write(course, "b.md", "# Notes B")
+    cache = CorpusCache()
+    first = cache.load(course)
+    write(course, "b.md", "# Notes B, revised")
+    os.remove(os.path.join(course, "a.md"))
+    write(course, "c.md", "# Notes C")
+    second = cache.load(course)
+    assert second is not first
+    assert second.context == "# Notes B, revised\n\n# Notes C"
+    assert parsed == ["a.md", "b.md", "b.md", "c.md"]
+
+
+def test_identical_packs_share_one_corpus(tmp_path, parsed):
+    for workspace in ("one", "two"):
+        write(str(tmp_path / workspace), "a.md", "# Same notes")
+    cache = CorpusCache()
+    assert cache.load(str(tmp_path / "one")) is cache.load(str(tmp_path / "two"))
+    assert parsed == ["a.md"]
+
+
+def test_least_recently_loaded_courses_are_dropped(tmp_path, parsed):
+    cache = CorpusCache(max_corpora=2)
+    for n in range(3):
+        write(str(tmp_path / f"course{n}"), "a.md", f"# Course {n}")
+        cache.load(str(tmp_path / f"course{n}"))
+    assert len(cache._corpora) == 2
+    assert len(cache._packs) == 2
+    cache.load(str(tmp_path / "course0"))
+    assert parsed == ["a.md", "a.md", "a.md", "a.md"]
+
+
+def test_invalidate_forces_a_rescan(tmp_path, parsed):
+    course = str(tmp_path / "course")
+    write(course, "a.md", "# Notes")
+    cache = CorpusCache()
+    first = cache.load(course)
+    cache.invalidate(course)
+    assert cache.load(course) is not first
+
+
+def test_slow_parse_does_not_block_other_courses(tmp_path, monkeypatch):
+    release = threading.Event()
+    parses = []
+
+    def parse(path):
+        parses.append(path)
+        if os.path.basename(path) == "slow.md":
+            release.wait(5)
+        return [SimpleNamespace(text=os.path.basename(path), metadata={"file_name": os.path.basename(path)})]
+
+    monkeypatch.setattr(corpus, "_parse", parse)
+    write(str(tmp_path / "big"), "slow.md", "# Large upload")
+    write(str(tmp_path / "small"), "fast.md", "# Small course")
+    cache = CorpusCache()
+
+    results = []
+    loaders = [threading.Thread(target=lambda: results.append(cache.load(str(tmp_path / "big")))) for _ in range(2)]
+    for loader in loaders:
+        loader.start()
+    time.sleep(0.05)
+    start = time.monotonic()
+    assert cache.load(str(tmp_path / "small")).context == "fast.md"
+    assert time.monotonic() - start < 1
+    release.set()
+    for loader in loaders:
+        loader.join()
+    # Both loads of the large pack waited for one parse
+    assert results[0] is results[1]
+    assert [os.path.basename(path) for path in parses].count("slow.md") == 1
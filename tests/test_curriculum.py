@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+
+from curriculum import CourseOutline, parse_sections, walk
+
+CURRICULUM = """# Course Title: Applied Data Science
+
+## Course Description
+A practical course on analysing data with Python.
+
+## Course Modules
+
+### Module 1: Data Cleaning
+- Missing values and outliers
+
+### Module 2: Regression
+- Linear models and residuals
+
+```
+# Module 9: not a heading inside code
+```
+
+**Module 3: Clustering**
+- k-means and hierarchical clustering
+"""
+
+PEDAGOGY = """# Pedagogy
+
+## Assessment Strategies
+Use rubric-based feedback on regression projects.
+
+## Engagement Techniques
+Think-pair-share and live coding.
+"""
+
+
+def document(text, name):
+    return SimpleNamespace(text=text, metadata={"file_name": name})
+
+
+def outline():
+    return CourseOutline([document(CURRICULUM, "curriculum.md"), document(PEDAGOGY, "pedagogy.md")])
+
+
+def test_parse_sections_nests_by_level_and_skips_code():
+    roots = parse_sections(CURRICULUM, "curriculum.md")
+    assert [section.title for section in roots] == ["Course Title: Applied Data Science"]
+    titles = [section.title for section in walk(roots)]
+    assert "Module 1: Data Cleaning" in titles
+    assert "Module 3: Clustering" in titles
+    assert not any("Module 9" in title for title in titles)
+    module_2 = next(section for section in walk(roots) if section.title == "Module 2: Regression")
+    assert "Linear models" in module_2.text
+    assert "Module 1" not in module_2.text
+
+
+def test_modules_and_guidance_are_indexed():
+    course = outline()
+    assert course.course_title == "Course Title: Applied Data Science"
+    assert course.module_titles == ["Module 1: Data Cleaning", "Module 2: Regression", "Module 3: Clustering"]
+    assert [section.title for section in course.guidance] == ["Assessment Strategies", "Engagement Techniques"]
+
+
+def test_match_module_by_number_or_name():
+    course = outline()
+    assert course.match_module("Write a quiz for module 2").title == "Module 2: Regression"
+    assert course.match_module("An activity about data cleaning").title == "Module 1: Data Cleaning"
+    assert course.match_module("Module 7 please") is None
+    assert course.match_module("General advice") is None
+
+
+def test_module_context_adds_matching_guidance_within_budget():
+    course = outline()
+    module = course.modules[2]
+    context = course.module_context(module, "How should I assess regression projects?", guidance_tokens=100)
+    assert "Linear models" in context
+    assert "rubric-based feedback" in context
+    assert "Think-pair-share" not in context
+    assert "Missing values" not in context
+    assert "rubric-based" not in course.module_context(module, "assess regression", guidance_tokens=0)
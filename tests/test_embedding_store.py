@@ -0,0 +1,114 @@
+import hashlib
+import time
+
+import numpy as np
+
+from embedding_store import EmbeddingStore
+from retrieval import Chunk
+
+
+class FakeEmbedModel:
+    """Deterministic vectors from the text's hash; records every text it embeds."""
+
+    def __init__(self, dim=8):
+        self.dim = dim
+        self.embedded = []
+
+    def get_text_embedding_batch(self, texts):
+        self.embedded.extend(texts)
+        return [self.vector(text) for text in texts]
+
+    def vector(self, text):
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        return np.random.default_rng(seed).standard_normal(self.dim).tolist()
+
+
+def chunks(*texts):
+    return [Chunk(text, "notes.md", hashlib.sha256(text.encode("utf-8")).hexdigest()) for text in texts]
+
+
+def unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_embeds_only_unseen_chunks(tmp_path):
+    model = FakeEmbedModel()
+    store = EmbeddingStore(str(tmp_path), "embed-model")
+    first = store.vectors_for(chunks("a", "b"), model)
+    assert model.embedded == ["a", "b"]
+
+    vectors = store.vectors_for(chunks("b", "c", "c"), model)
+    assert model.embedded == ["a", "b", "c"]
+    assert len(store) == 3
+    np.testing.assert_allclose(vectors[0], first[1])
+    np.testing.assert_allclose(vectors[1], unit(model.vector("c")), rtol=1e-6)
+    np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-6)
+
+
+def test_vectors_persist_across_reopen(tmp_path):
+    store = EmbeddingStore(str(tmp_path), "embed-model")
+    before = np.array(store.vectors_for(chunks("a", "b"), FakeEmbedModel()))
+
+    model = FakeEmbedModel()
+    reopened = EmbeddingStore(str(tmp_path), "embed-model")
+    np.testing.assert_allclose(reopened.vectors_for(chunks("a", "b"), model), before)
+    assert model.embedded == []
+
+
+def test_another_model_starts_a_fresh_store(tmp_path):
+    EmbeddingStore(str(tmp_path), "embed-model").vectors_for(chunks("a"), FakeEmbedModel())
+    model = FakeEmbedModel()
+    store = EmbeddingStore(str(tmp_path), "other-model")
+    assert len(store) == 0
+    store.vectors_for(chunks("a"), model)
+    assert model.embedded == ["a"]
+
+
+def test_compact_evicts_least_recently_used(tmp_path):
+    model = FakeEmbedModel()
+    store = EmbeddingStore(str(tmp_path), "embed-model")
+    for text in ("old", "middle", "new"):
+        store.vectors_for(chunks(text), model)
+        time.sleep(0.01)
+    # Using "old" again makes "middle" the least recently used
+    store.vectors_for(chunks("old"), model)
+
+    store.compact(max_rows=2)
+    assert len(store) == 2
+    assert store.stale_rows == 0
+    model.embedded.clear()
+    vectors = store.vectors_for(chunks("old", "new"), model)
+    assert model.embedded == []
+    np.testing.assert_allclose(vectors[0], unit(model.vector("old")), rtol=1e-6)
+    np.testing.assert_allclose(vectors[1], unit(model.vector("new")), rtol=1e-6)
+    store.vectors_for(chunks("middle"), model)
+    assert model.embedded == ["middle"]
+
+
+def test_compact_keeps_live_chunks(tmp_path):
+    model = FakeEmbedModel()
+    store = EmbeddingStore(str(tmp_path), "embed-model")
+    live = chunks("live")
+    store.vectors_for(live, model)
+    time.sleep(0.01)
+    store.vectors_for(chunks("recent"), model)
+
+    store.compact(max_rows=0, keep={live[0].sha256})
+    model.embedded.clear()
+    store.vectors_for(live + chunks("recent"), model)
+    assert model.embedded == ["recent"]
+
+
+def test_compact_drops_expired_chunks(tmp_path):
+    model = FakeEmbedModel()
+    store = EmbeddingStore(str(tmp_path), "embed-model")
+    store.vectors_for(chunks("stale"), model)
+    time.sleep(0.1)
+    store.vectors_for(chunks("fresh"), model)
+
+    store.compact(max_rows=10, max_age=0.05)
+    assert len(store) == 1
+    model.embedded.clear()
+    store.vectors_for(chunks("fresh", "stale"), model)
+    assert model.embedded == ["stale"]
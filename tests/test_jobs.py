@@ -0,0 +1,86 @@
+import threading
+import time
+
+from jobs import CANCELLED, DONE, FAILED, Job, JobQueue
+
+
+def wait_for(queue, job_id, timeout=2):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        job = queue.get(job_id)
+        if job is not None and not job.active:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"{job_id} still running")
+
+
+def test_job_records_result_and_error():
+    queue = JobQueue(2)
+    done = wait_for(queue, queue.submit("chat", "ok", lambda job, x: x * 2, 21))
+    assert (done.status, done.result) == (DONE, 42)
+
+    def fail(job):
+        raise ValueError("boom")
+
+    failed = wait_for(queue, queue.submit("chat", "fail", fail))
+    assert failed.status == FAILED
+    assert isinstance(failed.error, ValueError)
+
+
+def test_cancel_stops_a_running_job():
+    queue = JobQueue(1)
+    started = threading.Event()
+
+    def work(job):
+        started.set()
+        while True:
+            job.sleep(0.01)
+
+    job_id = queue.submit("chat", "long", work)
+    assert started.wait(1)
+    assert queue.cancel(job_id)
+    assert wait_for(queue, job_id).status == CANCELLED
+
+
+def test_cancel_drops_a_queued_job():
+    queue = JobQueue(1)
+    release = threading.Event()
+    blocker = queue.submit("chat", "blocker", lambda job: release.wait(2))
+    ran = []
+    queued = queue.submit("chat", "queued", lambda job: ran.append(job.id))
+    assert queue.cancel(queued)
+    assert queue.get(queued).status == CANCELLED
+    release.set()
+    wait_for(queue, blocker)
+    assert ran == []
+
+
+def test_child_jobs_share_cancellation():
+    parent = Job("p", "pack", "all")
+    child = parent.child(1, "chat", "one")
+    assert child.id == "p.1"
+    parent._cancel.set()
+    child.run(lambda job: "never")
+    assert child.status == CANCELLED
+
+
+def test_discard_forgets_only_finished_jobs():
+    queue = JobQueue(1)
+    release = threading.Event()
+    running = queue.submit("chat", "running", lambda job: release.wait(2))
+    queue.discard(running)
+    assert queue.get(running) is not None
+    release.set()
+    wait_for(queue, running)
+    queue.discard(running)
+    assert queue.get(running) is None
+
+
+def test_uncollected_jobs_expire():
+    queue = JobQueue(1, finished_ttl=0.05)
+    old = queue.submit("chat", "old", lambda job: "result")
+    wait_for(queue, old)
+    time.sleep(0.1)
+    new = queue.submit("chat", "new", lambda job: "result")
+    assert queue.get(old) is None
+    assert queue.get(new) is not None
@@ -0,0 +1,90 @@
+from memory import ConversationMemory
+
+MODEL = "gpt-4o"
+
+
+def exchange(n, question_words=20, answer_words=60):
+    return [("user", f"question {n} " + "word " * question_words), ("ai", f"answer {n} " + "word " * answer_words)]
+
+
+class Summarizer:
+    def __init__(self):
+        self.folds = []
+
+    def __call__(self, previous, turns, max_tokens):
+        self.folds.append(turns)
+        return f"{previous} [{len(turns)} turns]".strip()
+
+
+def test_short_history_is_replayed_verbatim():
+    memory = ConversationMemory(budget_tokens=400, summary_tokens=100)
+    summarize = Summarizer()
+    history = exchange(1)
+    messages = memory.messages(history, MODEL, summarize)
+    assert [(m.role, m.content) for m in messages] == [("user", history[0][1]), ("assistant", history[1][1])]
+    assert summarize.folds == []
+    assert memory.summarized_upto == 0
+
+
+def test_errors_are_not_replayed():
+    memory = ConversationMemory(budget_tokens=400, summary_tokens=100)
+    history = [("user", "first"), ("ai", "❌ Error: rate limited"), ("user", "second"), ("ai", "answer")]
+    assert [m.content for m in memory.messages(history, MODEL)] == ["first", "second", "answer"]
+
+
+def test_overflow_is_folded_in_batches():
+    memory = ConversationMemory(budget_tokens=400, summary_tokens=100)
+    summarize = Summarizer()
+    history = []
+    for n in range(20):
+        history += exchange(n)
+        memory.messages(history, MODEL, summarize)
+    # Each fold leaves half the window, so folds come every other exchange rather than on every follow-up
+    assert 0 < len(summarize.folds) <= 10
+    assert all(len(turns) >= 2 for turns in summarize.folds)
+    folded = [turn for turns in summarize.folds for turn in turns]
+    assert folded == history[:memory.summarized_upto]
+
+
+def test_window_stays_within_budget_and_starts_on_a_question():
+    memory = ConversationMemory(budget_tokens=400, summary_tokens=100)
+    summarize = Summarizer()
+    history = []
+    for n in range(12):
+        history += exchange(n, question_words=10, answer_words=45)
+        messages = memory.messages(history, MODEL, summarize)
+        verbatim = messages[1:] if memory.summary else messages
+        assert verbatim[0].role == "user"
+        assert sum(len(m.content) // 4 + 4 for m in verbatim) <= 300
+        if memory.summary:
+            assert messages[0].role == "system"
+            assert memory.summary in messages[0].content
+
+
+def test_failed_summary_falls_back_to_excerpts():
+    memory = ConversationMemory(budget_tokens=200, summary_tokens=100)
+
+    def failing(previous, turns, max_tokens):
+        raise RuntimeError("provider down")
+
+    history = exchange(1) + exchange(2) + exchange(3)
+    memory.messages(history, MODEL, failing)
+    assert memory.summary.startswith("Instructor: question 1")
+    assert "Assistant: answer 1" in memory.summary
+
+
+def test_long_latest_turn_is_truncated():
+    memory = ConversationMemory(budget_tokens=200, summary_tokens=100)
+    history = [("user", "question"), ("ai", "word " * 500)]
+    messages = memory.messages(history, MODEL)
+    assert messages[-1].role == "assistant"
+    assert len(messages[-1].content) // 4 <= 100
+
+
+def test_reset_forgets_the_summary():
+    memory = ConversationMemory(budget_tokens=200, summary_tokens=100)
+    memory.messages(exchange(1) + exchange(2) + exchange(3), MODEL)
+    assert memory.summary
+    memory.reset()
+    assert memory.summary == ""
+    assert memory.summarized_upto == 0
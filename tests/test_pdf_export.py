@@ -0,0 +1,67 @@
+import pytest
+
+pytest.importorskip("reportlab")
+
+from pdf_cache import FlowableCache, PdfCache  # noqa: E402
+from pdf_export import create_session_pdf, tokenize_markdown  # noqa: E402
+
+# Long enough for paragraphs and list items to land on page boundaries, where layout splits them
+BODY = "\n\n".join(
+    f"## Part {n}\n\n" + "Students compare approaches and record assumptions. " * 40
+    + "\n\n- item one\n- item two\n\n| a | b |\n|---|---|\n| x | y |"
+    for n in range(4)
+)
+
+
+def pdf_bytes(buffer):
+    data = buffer.getvalue()
+    assert data.startswith(b"%PDF")
+    return data
+
+
+def test_tokenize_markdown_blocks():
+    tokens = tokenize_markdown("# Title\n\nSome *text*.\n\n- one\n  - nested\n1. first\n\n```\ncode\n```\n\n---")
+    assert [token.kind for token in tokens] == ["heading", "paragraph", "bullet", "bullet", "ordered", "code", "rule"]
+    assert tokens[0].level == 1
+    assert tokens[3].level == 1
+    assert tokens[4].marker == "1"
+
+
+def test_growing_session_exports_through_one_cache():
+    cache = FlowableCache()
+    sections = []
+    for n in range(1, 8):
+        sections.append((f"Question {n}", f"{BODY}\n\nExtra note {n}"))
+        pdf_bytes(create_session_pdf(sections, "Session", cache))
+        # Exporting the same session again reuses every cached section
+        pdf_bytes(create_session_pdf(sections, "Session", cache))
+
+
+def test_cached_section_after_a_new_one():
+    cache = FlowableCache()
+    sections = [("Question", BODY)]
+    pdf_bytes(create_session_pdf(sections, "Session", cache))
+    pdf_bytes(create_session_pdf([("New question", "A short answer. " * 200)] + sections, "Session", cache))
+
+
+def test_flowable_cache_hands_out_copies():
+    cache = FlowableCache(max_entries=1)
+    first = cache.get_or_build(BODY, 400)
+    second = cache.get_or_build(BODY, 400)
+    assert len(first) == len(second)
+    assert all(a is not b for a, b in zip(first, second))
+    cache.get_or_build("other", 400)
+    assert len(cache._entries) == 1
+
+
+def test_pdf_cache_evicts_by_count_and_size():
+    cache = PdfCache(max_entries=2, max_bytes=10)
+    cache.put(PdfCache.key("a", "t"), b"1234")
+    cache.put(PdfCache.key("b", "t"), b"1234")
+    assert cache.get(PdfCache.key("a", "t")) == b"1234"
+    cache.put(PdfCache.key("c", "t"), b"1234")
+    # "b" was least recently used
+    assert cache.get(PdfCache.key("b", "t")) is None
+    cache.put(PdfCache.key("d", "t"), b"12345678")
+    assert cache.get(PdfCache.key("a", "t")) is None
+    assert cache.get(PdfCache.key("d", "t")) == b"12345678"
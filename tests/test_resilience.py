@@ -0,0 +1,241 @@
+import threading
+import time
+
+import pytest
+
+from metrics import REGISTRY
+from resilience import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, DeadlineExceeded, FirstTokenTimeout, RequestPolicy,
+    SlotWatch, is_retryable, retry_after,
+)
+
+
+class _Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = _Response(status_code, headers)
+
+
+class Flaky:
+    """Raises the given errors in turn, then returns ``result``."""
+
+    def __init__(self, *errors, result="ok"):
+        self.errors = list(errors)
+        self.result = result
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.result
+
+
+def policy(**kwargs):
+    kwargs.setdefault("retries", 3)
+    kwargs.setdefault("base_delay", 0.001)
+    kwargs.setdefault("max_delay", 0.01)
+    return RequestPolicy(**kwargs)
+
+
+def test_retryable_errors():
+    assert is_retryable(ProviderError(429))
+    assert is_retryable(ProviderError(503))
+    assert is_retryable(TimeoutError())
+    assert not is_retryable(ProviderError(400))
+    assert not is_retryable(ValueError())
+
+
+def test_retry_after_headers():
+    assert retry_after(ProviderError(429, {"retry-after": "2"})) == 2.0
+    assert retry_after(ProviderError(429, {"retry-after-ms": "1500"})) == 1.5
+    assert retry_after(ProviderError(429)) is None
+
+
+def test_backoff_never_shorter_than_retry_after():
+    p = policy(base_delay=0.001, max_delay=5.0)
+    assert all(p.backoff(0, requested=2.0) == 2.0 for _ in range(20))
+    assert all(p.backoff(0, requested=60.0) == 5.0 for _ in range(20))
+    assert all(0 <= p.backoff(3) <= 0.008 for _ in range(20))
+
+
+def test_transient_errors_are_retried():
+    fn = Flaky(ProviderError(429), ProviderError(502))
+    assert policy().call("op", fn) == "ok"
+    assert fn.calls == 3
+    assert REGISTRY.counters()["llm.retry"] == 2
+
+
+def test_permanent_errors_are_not_retried():
+    fn = Flaky(ProviderError(400))
+    with pytest.raises(ProviderError):
+        policy().call("op", fn)
+    assert fn.calls == 1
+
+
+def test_should_retry_narrows_retries():
+    fn = Flaky(ProviderError(503))
+    with pytest.raises(ProviderError):
+        policy().call("op", fn, should_retry=lambda error: False)
+    assert fn.calls == 1
+
+
+def test_gives_up_after_retries():
+    fn = Flaky(*[ProviderError(503)] * 10)
+    with pytest.raises(ProviderError):
+        policy(retries=2).call("op", fn)
+    assert fn.calls == 3
+
+
+def test_deadline_bounds_a_slow_attempt():
+    with pytest.raises(DeadlineExceeded):
+        policy(deadline=0.1).call("op", lambda: time.sleep(1))
+    assert REGISTRY.counters()["llm.deadline_exceeded"] == 1
+
+
+def test_hedge_answers_from_the_duplicate():
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) == 1:
+            time.sleep(1)
+            return "slow"
+        return "fast"
+
+    assert policy(hedge=True, hedge_delay=0.05).call("op", fn) == "fast"
+    assert REGISTRY.counters()["llm.hedge.won"] == 1
+
+
+def test_breaker_opens_after_consecutive_failures_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+    time.sleep(0.06)
+    breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # Only one trial call at a time while half-open
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    breaker.allow()
+
+
+def test_failed_trial_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+    for _ in range(3):
+        breaker.record_failure()
+    time.sleep(0.06)
+    breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_breaker_counts_requests_not_attempts():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    p = policy(retries=4, breaker=breaker)
+    with pytest.raises(ProviderError):
+        p.call("op", Flaky(*[ProviderError(429)] * 10))
+    assert breaker.failures == 1
+    assert breaker.state == CLOSED
+
+    with pytest.raises(ProviderError):
+        p.call("op", Flaky(*[ProviderError(429)] * 10))
+    assert breaker.state == OPEN
+    fn = Flaky()
+    with pytest.raises(CircuitOpenError):
+        p.call("op", fn)
+    assert fn.calls == 0
+
+
+def test_rejected_request_does_not_trip_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1)
+    with pytest.raises(ProviderError):
+        policy(breaker=breaker).call("op", Flaky(ProviderError(400)))
+    assert breaker.state == CLOSED
+
+
+def test_first_item_times_out_on_a_silent_stream():
+    release = threading.Event()
+
+    def silent():
+        release.wait(5)
+        yield "late"
+
+    p = policy(first_token_deadline=0.05)
+    with pytest.raises(FirstTokenTimeout):
+        p.first_item(silent())
+    release.set()
+    assert is_retryable(FirstTokenTimeout())
+    assert p.first_item(iter(["first", "second"])) == "first"
+    assert p.first_item(iter([])) is None
+
+
+class QueuedStream:
+    """A stream whose request queues for a connection slot (as ``BoundedTransport`` reports) before answering."""
+
+    def __init__(self, queue_for, answer_after):
+        self.queue_for = queue_for
+        self.answer_after = answer_after
+        self.sent = False
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        watch = SlotWatch.current()
+        watch.queued = True
+        end = time.monotonic() + self.queue_for
+        while time.monotonic() < end:
+            if watch.abandoned.is_set():
+                raise TimeoutError("abandoned while queued")
+            time.sleep(0.01)
+        watch.acquired_at = time.monotonic()
+        self.sent = True
+        time.sleep(self.answer_after)
+        return "chunk"
+
+    def close(self):
+        self.closed.set()
+
+
+def test_first_token_deadline_starts_once_a_slot_is_free():
+    stream = QueuedStream(queue_for=0.3, answer_after=0.05)
+    assert policy(first_token_deadline=0.2).first_item(stream) == "chunk"
+    assert not stream.closed.is_set()
+
+
+def test_late_first_chunk_closes_the_stream():
+    stream = QueuedStream(queue_for=0, answer_after=0.2)
+    with pytest.raises(FirstTokenTimeout):
+        policy(first_token_deadline=0.05).first_item(stream)
+    assert stream.closed.wait(1)
+
+
+def test_cancelled_wait_abandons_a_queued_request():
+    class Cancelled(Exception):
+        pass
+
+    class Job:
+        def raise_if_cancelled(self):
+            raise Cancelled()
+
+    stream = QueuedStream(queue_for=5, answer_after=0)
+    with pytest.raises(Cancelled):
+        policy(first_token_deadline=0.05).first_item(stream, Job())
+    time.sleep(0.1)
+    assert not stream.sent
@@ -0,0 +1,65 @@
+import io
+import os
+
+from uploads import save_uploads, upload_signature
+
+
+class Upload(io.BytesIO):
+    """Stands in for Streamlit's UploadedFile."""
+
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+
+
+def read(directory, name):
+    with open(os.path.join(directory, name), "rb") as f:
+        return f.read()
+
+
+def test_saves_files_in_chunks(tmp_path):
+    data = os.urandom(10_000)
+    result = save_uploads([Upload("notes.md", data)], str(tmp_path), 1 << 20, 1 << 20, chunk_size=1024)
+    assert result.written == ["notes.md"]
+    assert read(tmp_path, "notes.md") == data
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".upload-")]
+
+
+def test_unchanged_files_are_not_rewritten_and_missing_ones_removed(tmp_path):
+    save_uploads([Upload("a.md", b"one"), Upload("b.md", b"two")], str(tmp_path), 1 << 20, 1 << 20)
+    mtime = os.stat(tmp_path / "a.md").st_mtime_ns
+    result = save_uploads([Upload("a.md", b"one"), Upload("c.md", b"three")], str(tmp_path), 1 << 20, 1 << 20)
+    assert result.unchanged == ["a.md"]
+    assert result.written == ["c.md"]
+    assert result.removed == ["b.md"]
+    assert os.stat(tmp_path / "a.md").st_mtime_ns == mtime
+    assert sorted(os.listdir(tmp_path)) == ["a.md", "c.md"]
+
+
+def test_changed_content_of_the_same_size_is_rewritten(tmp_path):
+    save_uploads([Upload("a.md", b"one")], str(tmp_path), 1 << 20, 1 << 20)
+    result = save_uploads([Upload("a.md", b"two")], str(tmp_path), 1 << 20, 1 << 20)
+    assert result.written == ["a.md"]
+    assert read(tmp_path, "a.md") == b"two"
+
+
+def test_oversized_files_and_totals_are_rejected(tmp_path):
+    files = [Upload("big.md", b"x" * 200), Upload("a.md", b"x" * 60), Upload("b.md", b"x" * 60)]
+    result = save_uploads(files, str(tmp_path), max_file_bytes=100, max_total_bytes=100)
+    assert result.written == ["a.md"]
+    assert [name for name, _ in result.rejected] == ["big.md", "b.md"]
+    assert os.listdir(tmp_path) == ["a.md"]
+
+
+def test_file_names_cannot_leave_the_workspace(tmp_path):
+    workspace = tmp_path / "workspace"
+    workspace.mkdir()
+    save_uploads([Upload("../escape.md", b"data")], str(workspace), 1 << 20, 1 << 20)
+    assert os.listdir(workspace) == ["escape.md"]
+    assert not (tmp_path / "escape.md").exists()
+
+
+def test_upload_signature_identifies_the_file_set():
+    files = [Upload("a.md", b"one"), Upload("b.md", b"two")]
+    assert upload_signature(files) == (("a.md", 3), ("b.md", 3))
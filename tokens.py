@@ -0,0 +1,159 @@
+"""Token counting, prompt budgeting and per-request usage accounting."""
+import threading
+import time
+from collections import deque, namedtuple
+from functools import lru_cache
+
+from metrics import REGISTRY
+
+# Context windows in tokens; unknown models fall back to the longest matching prefix
+CONTEXT_WINDOWS = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-3.5-turbo-instruct": 4096,
+    "gpt-4": 8192,
+    "gpt-4-32k": 32768,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "gpt-4.1": 1047576,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Per-message framing tokens added by the chat format, plus the reply primer
+_MESSAGE_OVERHEAD = 4
+_REPLY_OVERHEAD = 3
+
+UsageRecord = namedtuple(
+    "UsageRecord",
+    ["timestamp", "kind", "model", "prompt_tokens", "completion_tokens", "max_tokens", "latency", "cached",
+     "cached_prompt_tokens"],
+)
+
+
+@lru_cache(maxsize=16)
+def _encoding(model):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # Encoding files could not be fetched (offline); fall back to estimates
+        return None
+
+
+def count_tokens(text, model):
+    encoding = _encoding(model)
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages, model):
+    return sum(count_tokens(message.content or "", model) + _MESSAGE_OVERHEAD for message in messages) + _REPLY_OVERHEAD
+
+
+def context_window(model):
+    if model in CONTEXT_WINDOWS:
+        return CONTEXT_WINDOWS[model]
+    prefixes = [name for name in CONTEXT_WINDOWS if model.startswith(name)]
+    return CONTEXT_WINDOWS[max(prefixes, key=len)] if prefixes else DEFAULT_CONTEXT_WINDOW
+
+
+def truncate_to_tokens(text, max_tokens, model):
+    """Cut ``text`` to at most ``max_tokens``, preferring a paragraph boundary."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _encoding(model)
+    if encoding is None:
+        if len(text) <= max_tokens * 4:
+            return text
+        truncated = text[:max_tokens * 4]
+    else:
+        ids = encoding.encode(text, disallowed_special=())
+        if len(ids) <= max_tokens:
+            return text
+        truncated = encoding.decode(ids[:max_tokens])
+    boundary = truncated.rfind("\n\n")
+    return truncated[:boundary] if boundary > len(truncated) // 2 else truncated
+
+
+def fit_context(context, other_tokens, model, completion_tokens):
+    """Trim ``context`` so it plus ``other_tokens`` leaves ``completion_tokens`` free."""
+    available = context_window(model) - other_tokens - completion_tokens
+    if count_tokens(context, model) <= available:
+        return context
+    return truncate_to_tokens(context, available, model)
+
+
+def completion_budget(prompt_tokens, model, desired):
+    """Pick ``max_tokens`` from what the context window has left after the prompt."""
+    return max(1, min(desired, context_window(model) - prompt_tokens))
+
+
+def _field(value, name):
+    return value.get(name) if isinstance(value, dict) else getattr(value, name, None)
+
+
+def response_usage(response):
+    """Return ``(prompt_tokens, completion_tokens, cached_prompt_tokens)`` reported by the provider.
+
+    Any of them is None when the provider did not report it; cached prompt
+    tokens are the prefix served from the provider's prompt cache.
+    """
+    usage = _field(getattr(response, "raw", None), "usage")
+    if usage is None:
+        return None, None, None
+    details = _field(usage, "prompt_tokens_details")
+    cached = _field(details, "cached_tokens") if details is not None else None
+    return _field(usage, "prompt_tokens"), _field(usage, "completion_tokens"), cached
+
+
+class UsageLog:
+    """Bounded, thread-safe log of token usage per LLM request."""
+
+    def __init__(self, max_records=1000):
+        self._records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+
+    def record(self, kind, model, prompt_tokens, completion_tokens, max_tokens, latency, cached=False,
+               cached_prompt_tokens=0):
+        with self._lock:
+            self._records.append(UsageRecord(time.time(), kind, model, prompt_tokens, completion_tokens,
+                                             max_tokens, latency, cached, cached_prompt_tokens))
+        REGISTRY.increment(f"tokens.{kind}.prompt", prompt_tokens or 0)
+        REGISTRY.increment(f"tokens.{kind}.completion", completion_tokens or 0)
+        REGISTRY.increment(f"tokens.{kind}.cached_prompt", cached_prompt_tokens or 0)
+
+    def records(self):
+        with self._lock:
+            return list(self._records)
+
+    def summary(self):
+        """Totals per request kind: count, prompt/completion tokens, mean latency and prompt-cache hit rate."""
+        totals = {}
+        for record in self.records():
+            entry = totals.setdefault(record.kind, {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                                                    "latency": 0.0, "cached": 0, "cached_prompt_tokens": 0})
+            entry["requests"] += 1
+            entry["prompt_tokens"] += record.prompt_tokens or 0
+            entry["completion_tokens"] += record.completion_tokens or 0
+            entry["latency"] += record.latency
+            entry["cached"] += int(record.cached)
+            entry["cached_prompt_tokens"] += record.cached_prompt_tokens or 0
+        for entry in totals.values():
+            entry["mean_latency"] = entry.pop("latency") / entry["requests"]
+            entry["prompt_cache_hit_rate"] = (
+                entry["cached_prompt_tokens"] / entry["prompt_tokens"] if entry["prompt_tokens"] else 0.0
+            )
+        return totals
+
+    def prompt_cache_hit_rate(self):
+        """Share of all prompt tokens the provider served from its prompt cache."""
+        records = self.records()
+        prompt_tokens = sum(record.prompt_tokens or 0 for record in records)
+        cached_tokens = sum(record.cached_prompt_tokens or 0 for record in records)
+        return cached_tokens / prompt_tokens if prompt_tokens else 0.0
@@ -0,0 +1,74 @@
+"""Chunked, size-bounded saving of uploaded course files."""
+import hashlib
+import os
+import tempfile
+from collections import namedtuple
+
+from corpus import hash_file, list_course_files
+
+UploadResult = namedtuple("UploadResult", ["written", "unchanged", "removed", "rejected"])
+
+
+def upload_signature(files):
+    """Identifies an upload set, so reruns with the same files can skip saving entirely."""
+    return tuple((getattr(file, "file_id", None) or file.name, file.size) for file in files)
+
+
+def _hash_upload(file, chunk_size):
+    digest = hashlib.sha256()
+    file.seek(0)
+    for block in iter(lambda: file.read(chunk_size), b""):
+        digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_upload(file, path, chunk_size):
+    # Written beside the target and renamed into place, so readers never see a partial file;
+    # the dot prefix keeps it out of list_course_files meanwhile
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            file.seek(0)
+            for block in iter(lambda: file.read(chunk_size), b""):
+                f.write(block)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def save_uploads(files, directory, max_file_bytes, max_total_bytes, chunk_size=1 << 20):
+    """Make ``directory`` hold exactly the accepted ``files``.
+
+    Files over ``max_file_bytes``, or past ``max_total_bytes`` in upload
+    order, are rejected. Files whose content hash matches the copy already
+    on disk are left untouched; everything else streams through in
+    ``chunk_size`` blocks.
+    """
+    written, unchanged, rejected = [], [], []
+    accepted, total = set(), 0
+    for file in files:
+        name = os.path.basename(file.name)
+        if file.size > max_file_bytes:
+            rejected.append((name, f"larger than {max_file_bytes // (1 << 20)} MB"))
+            continue
+        if total + file.size > max_total_bytes:
+            rejected.append((name, f"upload total would exceed {max_total_bytes // (1 << 20)} MB"))
+            continue
+        total += file.size
+        accepted.add(name)
+
+        path = os.path.join(directory, name)
+        if os.path.isfile(path) and os.path.getsize(path) == file.size \
+                and hash_file(path) == _hash_upload(file, chunk_size):
+            unchanged.append(name)
+            continue
+        _write_upload(file, path, chunk_size)
+        written.append(name)
+
+    removed = []
+    for path in list_course_files(directory):
+        if os.path.basename(path) not in accepted:
+            os.remove(path)
+            removed.append(os.path.basename(path))
+    return UploadResult(written, unchanged, removed, rejected)
@@ -0,0 +1,61 @@
+"""Per-course workspace directories, so sessions no longer share one upload folder."""
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+
+_WORKSPACE_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def new_workspace_id():
+    return uuid.uuid4().hex
+
+
+def valid_workspace_id(workspace_id):
+    return bool(workspace_id) and _WORKSPACE_ID.match(workspace_id) is not None
+
+
+def open_workspace(root, workspace_id):
+    """Create (or reopen) the workspace directory and mark it as recently used."""
+    if not valid_workspace_id(workspace_id):
+        raise ValueError(f"Invalid workspace ID: {workspace_id!r}")
+    path = os.path.join(root, workspace_id)
+    os.makedirs(path, exist_ok=True)
+    os.utime(path)
+    return path
+
+
+def sweep_workspaces(root, max_age):
+    """Delete workspaces not opened for ``max_age`` seconds; returns how many were removed."""
+    if not os.path.isdir(root):
+        return 0
+    cutoff = time.time() - max_age
+    removed = 0
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+class WorkspaceSweeper:
+    """Runs ``sweep_workspaces`` at most once every ``interval`` seconds, however often it is asked to."""
+
+    def __init__(self, root, max_age, interval):
+        self.root = root
+        self.max_age = max_age
+        self.interval = interval
+        self._last_sweep = None
+        self._lock = threading.Lock()
+
+    def maybe_sweep(self):
+        """Sweep if the last sweep is ``interval`` seconds old; returns how many workspaces were removed."""
+        with self._lock:
+            now = time.monotonic()
+            if self._last_sweep is not None and now - self._last_sweep < self.interval:
+                return 0
+            self._last_sweep = now
+        return sweep_workspaces(self.root, self.max_age)